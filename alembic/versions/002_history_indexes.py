@@ -0,0 +1,59 @@
+"""History and severity indexes
+
+Revision ID: 002
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+# Severities common enough in history filters to deserve their own partial index
+HOT_SEVERITIES = ('high', 'critical')
+
+
+def upgrade() -> None:
+    """Replace the history index with a descending covering index, add partial and BRIN indexes"""
+    op.drop_index('idx_user_tenant_created', table_name='insights')
+
+    # History: WHERE user_id, tenant_id ORDER BY created_at DESC
+    op.create_index(
+        'idx_user_tenant_created_desc',
+        'insights',
+        ['user_id', 'tenant_id', sa.text('created_at DESC')],
+        postgresql_include=['insight_id']
+    )
+
+    # History filtered by a hot severity
+    for severity in HOT_SEVERITIES:
+        op.create_index(
+            f'idx_user_tenant_sev_{severity}',
+            'insights',
+            ['user_id', 'tenant_id', sa.text('created_at DESC')],
+            postgresql_where=sa.text(f"(llm_output->>'severity') = '{severity}'")
+        )
+
+    # Monitoring range scans over created_at (rows arrive in time order)
+    op.create_index(
+        'idx_insights_created_brin',
+        'insights',
+        ['created_at'],
+        postgresql_using='brin'
+    )
+
+
+def downgrade() -> None:
+    """Restore the original history index"""
+    op.drop_index('idx_insights_created_brin', table_name='insights')
+    for severity in HOT_SEVERITIES:
+        op.drop_index(f'idx_user_tenant_sev_{severity}', table_name='insights')
+    op.drop_index('idx_user_tenant_created_desc', table_name='insights')
+
+    op.create_index(
+        'idx_user_tenant_created',
+        'insights',
+        ['user_id', 'tenant_id', 'created_at']
+    )
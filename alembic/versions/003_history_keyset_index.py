@@ -0,0 +1,35 @@
+"""History keyset pagination index
+
+Revision ID: 003
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Index the full (created_at, insight_id) keyset used by history pagination"""
+    op.drop_index('idx_user_tenant_created_desc', table_name='insights')
+
+    op.create_index(
+        'ix_insight_user_tenant_created',
+        'insights',
+        ['user_id', 'tenant_id', sa.text('created_at DESC'), sa.text('insight_id DESC')]
+    )
+
+
+def downgrade() -> None:
+    """Restore the covering history index"""
+    op.drop_index('ix_insight_user_tenant_created', table_name='insights')
+
+    op.create_index(
+        'idx_user_tenant_created_desc',
+        'insights',
+        ['user_id', 'tenant_id', sa.text('created_at DESC')],
+        postgresql_include=['insight_id']
+    )
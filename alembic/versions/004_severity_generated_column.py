@@ -0,0 +1,49 @@
+"""Generated severity column
+
+Revision ID: 004
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+HOT_SEVERITIES = ('high', 'critical')
+
+
+def upgrade() -> None:
+    """
+    Store llm_output->>'severity' as a generated column and index it for history filters.
+    Adding a STORED column rewrites the table - run during a maintenance window.
+    """
+    op.add_column(
+        'insights',
+        sa.Column('severity_cached', sa.Text, sa.Computed("llm_output->>'severity'", persisted=True))
+    )
+
+    op.create_index(
+        'ix_insight_user_tenant_severity_created',
+        'insights',
+        ['user_id', 'tenant_id', 'severity_cached', sa.text('created_at DESC'), sa.text('insight_id DESC')]
+    )
+
+    # Superseded by the index above
+    for severity in HOT_SEVERITIES:
+        op.drop_index(f'idx_user_tenant_sev_{severity}', table_name='insights')
+
+
+def downgrade() -> None:
+    """Restore the per-severity partial indexes and drop the generated column"""
+    for severity in HOT_SEVERITIES:
+        op.create_index(
+            f'idx_user_tenant_sev_{severity}',
+            'insights',
+            ['user_id', 'tenant_id', sa.text('created_at DESC')],
+            postgresql_where=sa.text(f"(llm_output->>'severity') = '{severity}'")
+        )
+
+    op.drop_index('ix_insight_user_tenant_severity_created', table_name='insights')
+    op.drop_column('insights', 'severity_cached')
@@ -0,0 +1,33 @@
+"""Severity and confidence indexes for tenant-wide analytics
+
+Revision ID: 005
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    Index severity (via the generated column) and confidence on their own,
+    for counts and filters that aren't scoped to a user.
+    """
+    # Severity breakdowns can be answered from this index alone
+    op.create_index('ix_insight_severity', 'insights', ['severity_cached'])
+
+    # Must match the CAST(llm_output->>'confidence' AS FLOAT) used in queries
+    op.create_index(
+        'ix_insight_confidence',
+        'insights',
+        [sa.text("(CAST(llm_output->>'confidence' AS FLOAT))")]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_insight_confidence', table_name='insights')
+    op.drop_index('ix_insight_severity', table_name='insights')
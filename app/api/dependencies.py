@@ -1,4 +1,5 @@
 from fastapi import Depends
+from functools import lru_cache
 from app.config import get_settings, Settings
 from app.clients.llm_base import LLMClient
 from app.clients.mock_llm import MockLLMClient
@@ -7,8 +8,10 @@ from app.clients.openai_client import OpenAIClient
 from app.services.insight_service import InsightService
 
 
-def get_llm_client(settings: Settings = Depends(get_settings)) -> LLMClient:
-    """Dependency injection for LLM client based on configuration"""
+@lru_cache()
+def _create_llm_client() -> LLMClient:
+    """Build the configured LLM client once per process"""
+    settings = get_settings()
     provider = settings.llm_provider.lower()
 
     if provider == "mock":
@@ -18,19 +21,36 @@ def get_llm_client(settings: Settings = Depends(get_settings)) -> LLMClient:
             raise ValueError("GEMINI_API_KEY not configured")
         return GeminiClient(
             api_key=settings.gemini_api_key,
-            model=settings.gemini_model
+            model=settings.gemini_model,
+            max_retries=settings.llm_max_retries
         )
     elif provider == "openai":
         if not settings.openai_api_key:
             raise ValueError("OPENAI_API_KEY not configured")
         return OpenAIClient(
             api_key=settings.openai_api_key,
-            model=settings.openai_model
+            model=settings.openai_model,
+            max_retries=settings.llm_max_retries
         )
     else:
         raise ValueError(f"Unknown LLM provider: {provider}")
 
 
+def get_llm_client() -> LLMClient:
+    """
+    Dependency injection for LLM client based on configuration.
+    A single instance is shared so its HTTP connection pool is reused.
+    """
+    return _create_llm_client()
+
+
+async def close_llm_client() -> None:
+    """Close the shared LLM client, if one was created"""
+    if _create_llm_client.cache_info().currsize:
+        await _create_llm_client().aclose()
+        _create_llm_client.cache_clear()
+
+
 def get_insight_service(
         llm_client: LLMClient = Depends(get_llm_client),
         settings: Settings = Depends(get_settings)
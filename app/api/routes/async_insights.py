@@ -1,14 +1,20 @@
-from fastapi import APIRouter, BackgroundTasks, HTTPException
-from pydantic import BaseModel
-from typing import List
+from fastapi import APIRouter, HTTPException, Request
+from pydantic import BaseModel, Field, ValidationError
+from typing import AsyncIterator, List, Optional
 from app.models.schemas import InsightRequest
-from app.tasks.insight_tasks import generate_insight_async, batch_generate_insights
-from celery.result import AsyncResult
+from app.tasks.insight_tasks import generate_insight_async
+from app.celery_app import celery_app
+from app.utils.redis_client import redis_binary_client
+import asyncio
+import orjson
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/v1/async", tags=["async-insights"])
 
+MAX_BATCH_SIZE = 100
+NDJSON_CHUNK_SIZE = 20  # Requests per batch task for streamed uploads
+
 
 class AsyncInsightResponse(BaseModel):
     task_id: str
@@ -23,11 +29,61 @@ class TaskStatusResponse(BaseModel):
     error: str = None
 
 
+class AsyncBatchResponse(BaseModel):
+    task_ids: List[str]
+    status: str
+    message: str
+
+
+class TaskStatusBatchRequest(BaseModel):
+    task_ids: List[str] = Field(..., min_length=1, max_length=100)
+
+
+def _submit_batch(requests_data: List[dict]) -> str:
+    """Enqueue a batch task and return its id"""
+    # The whole batch rides as one zstd-compressed message
+    task = celery_app.send_task(
+        'app.tasks.insight_tasks.batch_generate_insights',
+        args=[requests_data],
+        queue='batch',
+        compression='zstd'
+    )
+    logger.info(f"Batch task submitted: {task.id} ({len(requests_data)} items)")
+    return task.id
+
+
+async def _iter_ndjson_lines(request: Request) -> AsyncIterator[bytes]:
+    """Yield non-empty lines of an NDJSON body as they arrive"""
+    pending = b""
+    async for chunk in request.stream():
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if pending.strip():
+        yield pending
+
+
+def _task_status(task_id: str, raw_meta: Optional[bytes]) -> TaskStatusResponse:
+    """Build a status response from the raw result meta stored by the Celery backend"""
+    # No meta yet - Celery reports unknown tasks as PENDING too
+    if raw_meta is None:
+        return TaskStatusResponse(task_id=task_id, status="PENDING")
+
+    meta = celery_app.backend.decode_result(raw_meta)
+    response = TaskStatusResponse(task_id=task_id, status=meta['status'])
+
+    if meta['status'] == 'SUCCESS':
+        response.result = meta['result']
+    elif meta['status'] == 'FAILURE':
+        response.error = str(meta['result'])
+
+    return response
+
+
 @router.post("/generate-insight", response_model=AsyncInsightResponse)
-async def generate_insight_async_endpoint(
-        request: InsightRequest,
-        background_tasks: BackgroundTasks
-):
+async def generate_insight_async_endpoint(request: InsightRequest):
     """
     Submit insight generation as an async task.
     Returns immediately with a task_id.
@@ -35,8 +91,10 @@ async def generate_insight_async_endpoint(
     Use GET /async/task-status/{task_id} to check progress.
     """
     try:
-        # Submit to Celery
-        task = generate_insight_async.delay(request.dict())
+        # Submit to Celery - unset fields are filled back in by the worker
+        task = generate_insight_async.delay(
+            request.model_dump(mode='json', exclude_none=True, exclude_defaults=True)
+        )
 
         logger.info(f"Async task submitted: {task.id}")
 
@@ -63,22 +121,35 @@ async def get_task_status(task_id: str):
     - FAILURE: Task failed
     """
     try:
-        task_result = AsyncResult(task_id)
-
-        response = TaskStatusResponse(
-            task_id=task_id,
-            status=task_result.state
+        # Read the result meta directly - one non-blocking GET per poll
+        raw_meta = await redis_binary_client.get(
+            celery_app.backend.get_key_for_task(task_id)
         )
+        return _task_status(task_id, raw_meta)
+
+    except Exception as e:
+        logger.error(f"Failed to get task status: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-        if task_result.state == 'SUCCESS':
-            response.result = task_result.result
-        elif task_result.state == 'FAILURE':
-            response.error = str(task_result.info)
 
-        return response
+@router.post("/task-status/batch", response_model=List[TaskStatusResponse])
+async def get_task_status_batch(status_request: TaskStatusBatchRequest):
+    """
+    Check the status of several tasks (e.g. a batch's subtasks)
+    with a single Redis round trip.
+    """
+    try:
+        backend = celery_app.backend
+        raw_metas = await redis_binary_client.mget(
+            [backend.get_key_for_task(task_id) for task_id in status_request.task_ids]
+        )
+        return [
+            _task_status(task_id, raw_meta)
+            for task_id, raw_meta in zip(status_request.task_ids, raw_metas)
+        ]
 
     except Exception as e:
-        logger.error(f"Failed to get task status: {e}")
+        logger.error(f"Failed to get batch task status: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -88,24 +159,83 @@ async def batch_generate_insights_endpoint(requests: List[InsightRequest]):
     Submit multiple insights for batch processing.
     Useful for bulk data analysis.
     """
-    if len(requests) > 100:
+    if len(requests) > MAX_BATCH_SIZE:
         raise HTTPException(
             status_code=400,
-            detail="Batch size limited to 100 requests"
+            detail=f"Batch size limited to {MAX_BATCH_SIZE} requests"
         )
 
     try:
-        requests_data = [req.dict() for req in requests]
-        task = batch_generate_insights.delay(requests_data)
-
-        logger.info(f"Batch task submitted: {task.id} ({len(requests)} items)")
+        requests_data = [req.model_dump(mode='json', exclude_none=True) for req in requests]
+        task_id = _submit_batch(requests_data)
 
         return AsyncInsightResponse(
-            task_id=task.id,
+            task_id=task_id,
             status="submitted",
             message=f"Batch processing started for {len(requests)} insights."
         )
 
     except Exception as e:
         logger.error(f"Failed to submit batch task: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/batch-generate-ndjson", response_model=AsyncBatchResponse)
+async def batch_generate_insights_ndjson_endpoint(request: Request):
+    """
+    Submit insights for batch processing as NDJSON (one InsightRequest per line).
+
+    Lines are validated as they stream in and every 20 requests are enqueued
+    as a batch task while the rest of the body is still being read.
+    If a line is invalid, chunks already enqueued are reported in the error.
+    """
+    submissions: List[asyncio.Task] = []
+    chunk: List[dict] = []
+    count = 0
+
+    def submit(requests_data: List[dict]) -> None:
+        submissions.append(asyncio.create_task(asyncio.to_thread(_submit_batch, requests_data)))
+
+    async for line in _iter_ndjson_lines(request):
+        count += 1
+        if count > MAX_BATCH_SIZE:
+            error = f"Batch size limited to {MAX_BATCH_SIZE} requests"
+        else:
+            try:
+                insight_request = InsightRequest.model_validate(orjson.loads(line))
+                error = None
+            except (orjson.JSONDecodeError, ValidationError) as e:
+                error = f"Invalid request on line {count}: {e}"
+
+        if error:
+            results = await asyncio.gather(*submissions, return_exceptions=True)
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "error": error,
+                    "submitted_task_ids": [r for r in results if isinstance(r, str)]
+                }
+            )
+
+        chunk.append(insight_request.model_dump(mode='json', exclude_none=True))
+        if len(chunk) == NDJSON_CHUNK_SIZE:
+            submit(chunk)
+            chunk = []
+
+    if chunk:
+        submit(chunk)
+
+    if not submissions:
+        raise HTTPException(status_code=400, detail="Empty batch")
+
+    try:
+        task_ids = await asyncio.gather(*submissions)
+    except Exception as e:
+        logger.error(f"Failed to submit NDJSON batch: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return AsyncBatchResponse(
+        task_ids=task_ids,
+        status="submitted",
+        message=f"Batch processing started for {count} insights in {len(task_ids)} tasks."
+    )
@@ -1,29 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Request
-from typing import Optional
-from app.models.schemas import InsightRequest, InsightResponse, InsightHistoryResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from typing import AsyncIterator, Optional
+from datetime import datetime
+from uuid import UUID
+from redis.exceptions import RedisError
+from app.models.schemas import (
+    InsightRequest, InsightResponse, InsightHistoryItem, InsightHistoryResponse, InsightCountResponse, Severity
+)
 from app.services.insight_service import InsightService
 from app.repositories.insight_repository import InsightRepository
 from app.api.dependencies import get_insight_service
 from app.database.connection import get_db
 from app.utils.rate_limiter import limiter
-from sqlalchemy.orm import Session
+from app.utils.redis_client import redis_client
+from app.tasks.insight_tasks import persist_insight
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+import orjson
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/v1", tags=["insights"])
 
+HISTORY_COUNT_TTL_SECONDS = 60
 
-@router.post("/generate-insight", response_model=InsightResponse)
-@limiter.limit("10/minute")  # Rate limit per IP
+
+@router.post(
+    "/generate-insight",
+    response_model=InsightResponse,
+    dependencies=[Depends(limiter.limit("10/minute"))]  # Rate limit per IP
+)
 async def generate_insight(
-        request: Request,  # Required for rate limiter
         insight_request: InsightRequest,
-        service: InsightService = Depends(get_insight_service),
-        db: Session = Depends(get_db)
+        service: InsightService = Depends(get_insight_service)
 ):
     """
     Generate AI-powered insights from input data.
     Rate limited to 10 requests per minute per IP.
+    The insight is persisted asynchronously by the persist_insight task.
     """
     try:
         logger.info(f"Insight request from user={insight_request.user_id}, "
@@ -32,11 +46,18 @@ async def generate_insight(
         # Generate insight
         result = await service.generate_insight(insight_request)
 
-        # Save to database
-        repo = InsightRepository(db)
-        repo.create(result)
+        # One JSON-mode dump serves both the persist task and the response body
+        payload = result.model_dump(mode='json')
+
+        # Hand off persistence to Celery - the client doesn't wait for the write.
+        # The broker publish blocks, so it runs off the event loop
+        try:
+            await asyncio.to_thread(persist_insight.delay, payload)
+        except Exception as e:
+            logger.error(f"Failed to enqueue insight {result.insight_id} for persistence: {e}")
 
-        return result
+        # Returned directly so FastAPI doesn't re-validate and re-serialize the model
+        return ORJSONResponse(payload)
 
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -45,57 +66,168 @@ async def generate_insight(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-@router.get("/insight-history/{user_id}", response_model=InsightHistoryResponse)
-@limiter.limit("30/minute")
+def _sse_event(event: str, data) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+@router.post(
+    "/generate-insight/stream",
+    dependencies=[Depends(limiter.limit("10/minute"))]
+)
+async def generate_insight_stream(
+        insight_request: InsightRequest,
+        service: InsightService = Depends(get_insight_service)
+):
+    """
+    Generate an insight, streaming the LLM output as server-sent events.
+
+    Emits `delta` events with raw LLM text as it is generated, then one
+    `insight` event carrying the same document /generate-insight returns.
+    Rate limited to 10 requests per minute per IP.
+    """
+    stream = service.stream_insight(insight_request)
+
+    # Pull the first event here so bad input still gets a 400 status
+    try:
+        first = await stream.__anext__()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Insight stream failed to start: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    async def events() -> AsyncIterator[bytes]:
+        item = first
+        try:
+            while True:
+                if isinstance(item, InsightResponse):
+                    payload = item.model_dump(mode='json')
+                    try:
+                        await asyncio.to_thread(persist_insight.delay, payload)
+                    except Exception as e:
+                        logger.error(f"Failed to enqueue insight {item.insight_id} for persistence: {e}")
+                    yield _sse_event("insight", payload)
+                    return
+
+                yield _sse_event("delta", item)
+                item = await stream.__anext__()
+        finally:
+            # Release the provider stream if the client disconnected mid-way
+            await stream.aclose()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+
+@router.get(
+    "/insight-history/{user_id}",
+    response_model=InsightHistoryResponse,
+    dependencies=[Depends(limiter.limit("30/minute"))]
+)
 async def get_insight_history(
-        request: Request,
         user_id: str,
+        response: Response,
         tenant_id: str = Query(..., description="Tenant ID for data isolation"),
         limit: int = Query(50, ge=1, le=100),
-        offset: int = Query(0, ge=0),
-        severity: Optional[str] = Query(None, regex="^(critical|high|medium|low)$"),
-        db: Session = Depends(get_db)
+        severity: Optional[Severity] = Query(None),
+        cursor_created_at: Optional[datetime] = Query(None, description="pagination.next_cursor of the previous page"),
+        cursor_id: Optional[UUID] = Query(None, description="pagination.next_cursor of the previous page"),
+        db: AsyncSession = Depends(get_db)
 ):
     """
-    Retrieve insight history for a user.
+    Retrieve insight history for a user, newest first.
     Rate limited to 30 requests per minute per IP.
+    Pages are keyset paginated - pass pagination.next_cursor back to get the next page.
     """
     try:
         repo = InsightRepository(db)
-        insights, total_count = repo.get_by_user(
+        rows, has_more = await repo.get_by_user(
             user_id=user_id,
             tenant_id=tenant_id,
             limit=limit,
-            offset=offset,
-            severity=severity
+            severity=severity,
+            cursor_created_at=cursor_created_at,
+            cursor_id=cursor_id
         )
 
-        # Convert to response format
-        from app.models.schemas import InsightHistoryItem
-        history_items = []
-        for insight in insights:
-            history_items.append(InsightHistoryItem(
-                insight_id=insight.insight_id,
-                timestamp=insight.created_at,
-                metric_name=insight.input_data.get('metric_name', 'Unknown'),
-                severity=insight.llm_output.get('severity', 'low'),
-                summary=insight.llm_output.get('summary', '')[:200],  # Truncate
-                change_percent=insight.features.get('change_percent', 0.0)
-            ))
+        # Rows are already projected to the history fields
+        history_items = [InsightHistoryItem(**row._mapping) for row in rows]
+
+        # Let clients that poll history reuse a page briefly
+        response.headers["Cache-Control"] = "private, max-age=10"
+
+        next_cursor = None
+        if has_more:
+            next_cursor = {
+                "cursor_created_at": history_items[-1].timestamp,
+                "cursor_id": history_items[-1].insight_id
+            }
 
         return InsightHistoryResponse(
             user_id=user_id,
             tenant_id=tenant_id,
-            total_count=total_count,
             returned_count=len(history_items),
             insights=history_items,
             pagination={
                 "limit": limit,
-                "offset": offset,
-                "has_more": total_count > (offset + len(history_items))
+                "has_more": has_more,
+                "next_cursor": next_cursor
             }
         )
 
     except Exception as e:
         logger.error(f"Failed to retrieve history: {e}")
-        raise HTTPException(status_code=500, detail="Internal server error")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get(
+    "/insight-history/{user_id}/count",
+    response_model=InsightCountResponse,
+    dependencies=[Depends(limiter.limit("30/minute"))]
+)
+async def get_insight_history_count(
+        user_id: str,
+        tenant_id: str = Query(..., description="Tenant ID for data isolation"),
+        severity: Optional[Severity] = Query(None),
+        db: AsyncSession = Depends(get_db)
+):
+    """
+    Total number of insights in a user's history.
+    Counts are cached in Redis for a minute since they need a full index scan.
+    """
+    cache_key = f"history-count:{tenant_id}:{user_id}:{severity or '*'}"
+
+    # The cache fails open - Redis errors fall through to the database
+    try:
+        cached = await redis_client.get(cache_key)
+    except RedisError as e:
+        logger.warning(f"History count cache unavailable: {e}")
+        cached = None
+
+    if cached is not None:
+        total_count = int(cached)
+    else:
+        try:
+            total_count = await InsightRepository(db).count_by_user(
+                user_id=user_id,
+                tenant_id=tenant_id,
+                severity=severity
+            )
+        except Exception as e:
+            logger.error(f"Failed to count history: {e}")
+            raise HTTPException(status_code=500, detail="Internal server error")
+
+        try:
+            await redis_client.setex(cache_key, HISTORY_COUNT_TTL_SECONDS, total_count)
+        except RedisError as e:
+            logger.warning(f"History count cache write failed: {e}")
+
+    return InsightCountResponse(
+        user_id=user_id,
+        tenant_id=tenant_id,
+        severity=severity,
+        total_count=total_count
+    )
@@ -1,7 +1,8 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
 from typing import Optional, Dict
-import time
+import asyncio
+import orjson
 
 router = APIRouter(prefix="/api/v1", tags=["mock"])
 
@@ -20,36 +21,37 @@ class MockLLMResponse(BaseModel):
     finish_reason: str = "stop"
 
 
+# The mock response is static, so serialize it once at import time
+_MOCK_CONTENT_JSON = orjson.dumps({
+    "summary": "This is a mock LLM response for testing purposes.",
+    "severity": "medium",
+    "confidence": 0.85,
+    "recommended_actions": [
+        "Action 1 based on analysis",
+        "Action 2 for further investigation"
+    ],
+    "key_findings": [
+        "Finding 1 from the data",
+        "Finding 2 showing patterns"
+    ]
+}).decode()
+
+
 @router.post("/mock-llm", response_model=MockLLMResponse)
 async def mock_llm_endpoint(request: MockLLMRequest):
     """
     Mock LLM endpoint for testing.
     Returns a plausible JSON response based on prompt.
     """
-    # Simulate processing time
-    time.sleep(0.5)
-
-    # Generate mock response
-    mock_content = {
-        "summary": "This is a mock LLM response for testing purposes.",
-        "severity": "medium",
-        "confidence": 0.85,
-        "recommended_actions": [
-            "Action 1 based on analysis",
-            "Action 2 for further investigation"
-        ],
-        "key_findings": [
-            "Finding 1 from the data",
-            "Finding 2 showing patterns"
-        ]
-    }
-
-    import json
+    # Simulate processing time without blocking the event loop
+    await asyncio.sleep(0.5)
+
+    prompt_tokens = len(request.prompt.split())
     return MockLLMResponse(
-        content=json.dumps(mock_content),
+        content=_MOCK_CONTENT_JSON,
         usage={
-            "prompt_tokens": len(request.prompt.split()),
+            "prompt_tokens": prompt_tokens,
             "completion_tokens": 50,
-            "total_tokens": len(request.prompt.split()) + 50
+            "total_tokens": prompt_tokens + 50
         }
     )
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database.connection import get_db
 from app.services.drift_monitor import DriftMonitor
 from typing import Dict
@@ -11,7 +11,7 @@ router = APIRouter(prefix="/api/v1/monitoring", tags=["monitoring"])
 async def check_drift(
         days: int = Query(7, ge=1, le=90),
         threshold: float = Query(0.3, ge=0.0, le=1.0),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ) -> Dict:
     """
     Check for model drift.
@@ -19,13 +19,13 @@ async def check_drift(
     Compares LLM outputs to rule-based baselines.
     """
     monitor = DriftMonitor(db)
-    return monitor.detect_drift(days=days, disagreement_threshold=threshold)
+    return await monitor.detect_drift(days=days, disagreement_threshold=threshold)
 
 
 @router.get("/output-distribution")
 async def get_output_distribution(
         days: int = Query(30, ge=1, le=365),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ) -> Dict:
     """
     Analyze LLM output distribution over time.
@@ -33,7 +33,7 @@ async def get_output_distribution(
     Tracks summary length and confidence trends.
     """
     monitor = DriftMonitor(db)
-    return monitor.get_output_distribution(days=days)
+    return await monitor.get_output_distribution(days=days)
 
 
 @router.get("/compare-prompts")
@@ -41,7 +41,7 @@ async def compare_prompt_versions(
         version_a: str = Query(..., description="First prompt version"),
         version_b: str = Query(..., description="Second prompt version"),
         days: int = Query(7, ge=1, le=90),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ) -> Dict:
     """
     Compare two prompt versions (A/B testing).
@@ -49,4 +49,4 @@ async def compare_prompt_versions(
     Requires prompt_version to be stored in metadat.
     """
     monitor = DriftMonitor(db)
-    return monitor.compare_prompt_versions(version_a, version_b, days=days)
\ No newline at end of file
+    return await monitor.compare_prompt_versions(version_a, version_b, days=days)
\ No newline at end of file
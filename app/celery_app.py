@@ -13,9 +13,12 @@ celery_app = Celery(
 
 # Celery configuration
 celery_app.conf.update(
-    task_serializer='json',
-    accept_content=['json'],
-    result_serializer='json',
+    # msgpack is smaller and faster than JSON; payloads must be JSON-mode dumps
+    # (msgpack has no datetime/UUID types). JSON still accepted for in-flight tasks.
+    task_serializer='msgpack',
+    accept_content=['msgpack', 'json'],
+    result_serializer='msgpack',
+    result_accept_content=['msgpack', 'json'],
     timezone='UTC',
     enable_utc=True,
     task_track_started=True,
@@ -23,10 +26,17 @@ celery_app.conf.update(
     task_soft_time_limit=270,  # 4.5 minutes warning
     worker_prefetch_multiplier=4,
     worker_max_tasks_per_child=1000,
+    # Results are polled once or twice shortly after submit - keep them short-lived
+    result_expires=600,  # 10 minutes
+    result_backend_transport_options={'global_keyprefix': 'pythia:'},
+    # Unacked messages are redelivered after this - keep it above the slowest
+    # LLM task (plus batch buffering) so long calls aren't run twice
+    broker_transport_options={'visibility_timeout': 600},
 )
 
 # Task routes (optional - for task prioritization)
 celery_app.conf.task_routes = {
     'app.tasks.insight_tasks.generate_insight_async': {'queue': 'insights'},
     'app.tasks.insight_tasks.batch_generate_insights': {'queue': 'batch'},
+    'app.tasks.insight_tasks.persist_insight': {'queue': 'persist'},
 }
\ No newline at end of file
@@ -1,36 +1,49 @@
-import json
-import httpx
-from typing import Dict, Any
-from .llm_base import LLMClient
+from typing import AsyncIterator, Dict, Any, Optional
+from .llm_base import LLMClient, SchemaTextCache, schema_to_json
+from .llm_cache import cache_response
+from .http_retry import build_http_client, post_sse, post_with_retry
+
+# Schema instructions appended to every prompt
+_schema_suffix = SchemaTextCache(
+    lambda schema: (
+        "\n\nCRITICAL: You MUST respond with valid JSON matching this exact schema:\n"
+        f"{schema_to_json(schema)}\n\n"
+        "Return ONLY the JSON object, no markdown formatting, no explanations."
+    )
+)
 
 
 class GeminiClient(LLMClient):
-    def __init__(self, api_key: str, model: str = "gemini-2.5-flash-pro"):
+    def __init__(self, api_key: str, model: str = "gemini-2.5-flash-pro", max_retries: int = 3):
         self.api_key = api_key
         self.model = model
         self.base_url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent"
+        self._url = f"{self.base_url}?key={api_key}"
+        self._stream_url = (
+            f"https://generativelanguage.googleapis.com/v1beta/models/{model}:streamGenerateContent"
+            f"?alt=sse&key={api_key}"
+        )
 
-    async def generate(
+        self.max_retries = max_retries
+
+        # Shared client so connections (and TLS sessions) are reused across calls
+        self._client = build_http_client()
+
+    def _payload(
             self,
             prompt: str,
             response_schema: Dict[str, Any],
-            temperature: float = 0.7,
-            max_tokens: int = 1000
-    ) -> str:
-        """Call Gemini API with structured output guidance"""
-
-        # Enhance prompt with schema instructions
-        enhanced_prompt = f"""{prompt}
-
-CRITICAL: You MUST respond with valid JSON matching this exact schema:
-{json.dumps(response_schema, indent=2)}
-
-Return ONLY the JSON object, no markdown formatting, no explanations."""
+            temperature: float,
+            max_tokens: int,
+            system_prompt: Optional[str]
+    ) -> Dict[str, Any]:
+        schema_suffix = _schema_suffix.get(response_schema)
 
         payload = {
             "contents": [{
                 "parts": [{
-                    "text": enhanced_prompt
+                    # Without a system prompt, enhance the prompt with schema instructions
+                    "text": prompt if system_prompt else prompt + schema_suffix
                 }]
             }],
             "generationConfig": {
@@ -40,22 +53,62 @@ Return ONLY the JSON object, no markdown formatting, no explanations."""
             }
         }
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                f"{self.base_url}?key={self.api_key}",
-                json=payload,
-                headers={"Content-Type": "application/json"}
-            )
-            response.raise_for_status()
+        if system_prompt:
+            # Static instructions and schema go in the system instruction,
+            # keeping the cacheable prefix identical across requests
+            payload["systemInstruction"] = {"parts": [{"text": system_prompt + schema_suffix}]}
 
-            data = response.json()
+        return payload
 
-            # Extract text from Gemini response structure
-            if "candidates" in data and len(data["candidates"]) > 0:
-                content = data["candidates"][0]["content"]["parts"][0]["text"]
-                return content
-            else:
-                raise ValueError("No content in Gemini response")
+    @cache_response
+    async def generate(
+            self,
+            prompt: str,
+            response_schema: Dict[str, Any],
+            temperature: float = 0.7,
+            max_tokens: int = 1000,
+            system_prompt: Optional[str] = None
+    ) -> str:
+        """Call Gemini API with structured output guidance"""
+        response = await post_with_retry(
+            self._client,
+            self._url,
+            max_attempts=self.max_retries,
+            json=self._payload(prompt, response_schema, temperature, max_tokens, system_prompt),
+            headers={"Content-Type": "application/json"}
+        )
+
+        data = response.json()
+
+        # Extract text from Gemini response structure
+        if "candidates" in data and len(data["candidates"]) > 0:
+            content = data["candidates"][0]["content"]["parts"][0]["text"]
+            return content
+        else:
+            raise ValueError("No content in Gemini response")
+
+    async def stream(
+            self,
+            prompt: str,
+            response_schema: Dict[str, Any],
+            temperature: float = 0.7,
+            max_tokens: int = 1000,
+            system_prompt: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Stream the response text chunk by chunk (streamGenerateContent over SSE)"""
+        async for event in post_sse(
+                self._client,
+                self._stream_url,
+                json=self._payload(prompt, response_schema, temperature, max_tokens, system_prompt),
+                headers={"Content-Type": "application/json"}
+        ):
+            for candidate in event.get("candidates", []):
+                for part in candidate.get("content", {}).get("parts", []):
+                    if part.get("text"):
+                        yield part["text"]
 
     def get_model_name(self) -> str:
         return self.model
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
@@ -0,0 +1,96 @@
+from tenacity import (
+    AsyncRetrying,
+    RetryCallState,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential_jitter
+)
+from typing import Any, AsyncIterator
+import httpx
+import orjson
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Provider responses worth retrying: rate limited or transient server errors
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Upper bound on any single wait, including server-provided Retry-After
+MAX_RETRY_WAIT_SECONDS = 30.0
+
+_backoff = wait_exponential_jitter(initial=1, max=10)
+
+
+def build_http_client() -> httpx.AsyncClient:
+    """
+    Shared HTTP/2 client for LLM providers.
+    The transport retries failed connection attempts; status retries
+    are handled by post_with_retry.
+    """
+    return httpx.AsyncClient(
+        transport=httpx.AsyncHTTPTransport(
+            http2=True,
+            retries=3,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+        ),
+        timeout=httpx.Timeout(30.0, connect=5.0)
+    )
+
+
+def _is_retryable(error: BaseException) -> bool:
+    return (
+        isinstance(error, httpx.HTTPStatusError)
+        and error.response.status_code in RETRYABLE_STATUS_CODES
+    )
+
+
+def _wait(retry_state: RetryCallState) -> float:
+    """Honor Retry-After (in seconds) when the provider sends one, else back off exponentially"""
+    error = retry_state.outcome.exception()
+    retry_after = error.response.headers.get("Retry-After", "")
+    if retry_after.isdigit():
+        return min(float(retry_after), MAX_RETRY_WAIT_SECONDS)
+    return _backoff(retry_state)
+
+
+async def post_with_retry(
+        client: httpx.AsyncClient,
+        url: str,
+        max_attempts: int = 3,
+        **kwargs
+) -> httpx.Response:
+    """
+    POST and raise for status, retrying 429/5xx responses.
+    The last error is re-raised once attempts are exhausted.
+    """
+    async for attempt in AsyncRetrying(
+            stop=stop_after_attempt(max_attempts),
+            wait=_wait,
+            retry=retry_if_exception(_is_retryable),
+            before_sleep=lambda state: logger.warning(
+                f"LLM provider returned {state.outcome.exception().response.status_code}, "
+                f"retrying (attempt {state.attempt_number}/{max_attempts})"
+            ),
+            reraise=True
+    ):
+        with attempt:
+            response = await client.post(url, **kwargs)
+            response.raise_for_status()
+
+    return response
+
+
+async def post_sse(client: httpx.AsyncClient, url: str, **kwargs) -> AsyncIterator[Any]:
+    """
+    POST and yield the parsed JSON payload of each server-sent event.
+    Streams aren't retried - events may already have been consumed.
+    """
+    async with client.stream("POST", url, **kwargs) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            yield orjson.loads(data)
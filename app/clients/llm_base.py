@@ -1,5 +1,30 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import AsyncIterator, Callable, Dict, Any, Optional, Tuple
+import orjson
+
+
+class SchemaTextCache:
+    """
+    Caches text derived from a response schema.
+    Schemas are long-lived objects, so entries are keyed by identity.
+    """
+
+    def __init__(self, build: Callable[[Dict[str, Any]], str]):
+        self._build = build
+        self._cache: Dict[int, Tuple[Dict[str, Any], str]] = {}
+
+    def get(self, response_schema: Dict[str, Any]) -> str:
+        cached = self._cache.get(id(response_schema))
+        if cached is None or cached[0] is not response_schema:
+            cached = (response_schema, self._build(response_schema))
+            self._cache[id(response_schema)] = cached
+        return cached[1]
+
+
+# Pretty-printed JSON for a response schema, serialized once per schema object
+schema_to_json = SchemaTextCache(
+    lambda schema: orjson.dumps(schema, option=orjson.OPT_INDENT_2).decode()
+).get
 
 
 class LLMClient(ABC):
@@ -11,16 +36,38 @@ class LLMClient(ABC):
             prompt: str,
             response_schema: Dict[str, Any],
             temperature: float = 0.7,
-            max_tokens: int = 1000
+            max_tokens: int = 1000,
+            system_prompt: Optional[str] = None
     ) -> str:
         """
         Generate text from prompt.
 
+        system_prompt carries static instructions. Providers send it ahead of
+        the prompt so the shared prefix can be served from their prompt cache.
+
         Returns: JSON string that should match response_schema
         """
         pass
 
+    async def stream(
+            self,
+            prompt: str,
+            response_schema: Dict[str, Any],
+            temperature: float = 0.7,
+            max_tokens: int = 1000,
+            system_prompt: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream the response text as it is generated.
+        Providers without a streaming API yield the whole response at once.
+        """
+        yield await self.generate(prompt, response_schema, temperature, max_tokens, system_prompt)
+
     @abstractmethod
     def get_model_name(self) -> str:
         """Return the model identifier"""
         pass
+
+    async def aclose(self) -> None:
+        """Release any pooled connections held by the client"""
+        pass
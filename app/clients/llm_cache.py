@@ -0,0 +1,74 @@
+from functools import wraps
+from hashlib import blake2b
+from typing import Any, Awaitable, Callable, Dict, Optional
+from redis.exceptions import RedisError
+from app.config import get_settings
+from app.utils.redis_client import redis_client
+from .llm_base import schema_to_json
+import orjson
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Above this temperature responses aren't reproducible, so they aren't cached
+MAX_CACHEABLE_TEMPERATURE = 0.1
+
+
+def cache_key(
+        provider: str,
+        model: str,
+        temperature: float,
+        prompt: str,
+        response_schema: Dict[str, Any],
+        system_prompt: Optional[str] = None
+) -> str:
+    """Redis key for an LLM response: hash of everything that determines the output"""
+    digest = blake2b(digest_size=16)
+    digest.update(f"{provider}|{model}|{temperature}|{system_prompt or ''}|{prompt}|".encode())
+    digest.update(schema_to_json(response_schema).encode())
+    return f"llm:{digest.hexdigest()}"
+
+
+def cache_response(generate: Callable[..., Awaitable[str]]) -> Callable[..., Awaitable[str]]:
+    """
+    Decorator for LLMClient.generate that serves deterministic
+    (low temperature) requests from Redis.
+    The cache fails open - Redis errors fall through to the provider.
+    """
+    @wraps(generate)
+    async def wrapper(
+            self,
+            prompt: str,
+            response_schema: Dict[str, Any],
+            temperature: float = 0.7,
+            max_tokens: int = 1000,
+            system_prompt: Optional[str] = None
+    ) -> str:
+        if temperature > MAX_CACHEABLE_TEMPERATURE:
+            return await generate(self, prompt, response_schema, temperature, max_tokens, system_prompt)
+
+        key = cache_key(
+            type(self).__name__, self.get_model_name(), temperature, prompt, response_schema, system_prompt
+        )
+        try:
+            cached = await redis_client.get(key)
+            if cached is not None:
+                logger.info(f"LLM cache hit: {key}")
+                return cached
+        except RedisError as e:
+            logger.warning(f"LLM cache unavailable: {e}")
+
+        response = await generate(self, prompt, response_schema, temperature, max_tokens, system_prompt)
+
+        # Only cache well-formed JSON so a bad completion isn't replayed
+        try:
+            orjson.loads(response)
+            await redis_client.setex(key, get_settings().llm_cache_ttl_seconds, response)
+        except orjson.JSONDecodeError:
+            pass
+        except RedisError as e:
+            logger.warning(f"LLM cache write failed: {e}")
+
+        return response
+
+    return wrapper
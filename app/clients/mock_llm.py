@@ -1,8 +1,9 @@
-import json
+import orjson
 import asyncio
 import random
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from .llm_base import LLMClient
+from .llm_cache import cache_response
 
 
 class MockLLMClient(LLMClient):
@@ -11,12 +12,14 @@ class MockLLMClient(LLMClient):
     def __init__(self):
         self.model = "mock-llm-v1"
 
+    @cache_response
     async def generate(
             self,
             prompt: str,
             response_schema: Dict[str, Any],
             temperature: float = 0.7,
-            max_tokens: int = 1000
+            max_tokens: int = 1000,
+            system_prompt: Optional[str] = None
     ) -> str:
         """Generate mock insights based on prompt patterns"""
 
@@ -24,10 +27,11 @@ class MockLLMClient(LLMClient):
         await asyncio.sleep(random.uniform(0.5, 2.0))
 
         # Parse severity from prompt (crude extraction)
+        text = f"{system_prompt or ''}{prompt}".lower()
         severity = "medium"
-        if "critical" in prompt.lower() or "spike" in prompt.lower():
+        if "critical" in text or "spike" in text:
             severity = "high"
-        if "severe" in prompt.lower():
+        if "severe" in text:
             severity = "critical"
 
         # Generate mock response
@@ -47,7 +51,7 @@ class MockLLMClient(LLMClient):
             ]
         }
 
-        return json.dumps(mock_response)
+        return orjson.dumps(mock_response).decode()
 
     def get_model_name(self) -> str:
         return self.model
\ No newline at end of file
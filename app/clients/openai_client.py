@@ -1,34 +1,47 @@
-import json
-import httpx
-from typing import Dict, Any
-from .llm_base import LLMClient
+from typing import AsyncIterator, Dict, Any, Optional
+from .llm_base import LLMClient, SchemaTextCache, schema_to_json
+from .llm_cache import cache_response
+from .http_retry import build_http_client, post_sse, post_with_retry
+
+# System message carrying the schema
+_system_prompt = SchemaTextCache(
+    lambda schema: (
+        "You are a data insights analyst. You must respond with valid JSON matching this schema:\n"
+        f"{schema_to_json(schema)}\n\n"
+        "Return ONLY valid JSON, no markdown formatting."
+    )
+)
 
 
 class OpenAIClient(LLMClient):
-    def __init__(self, api_key: str, model: str = "gpt-4-turbo-preview"):
+    def __init__(self, api_key: str, model: str = "gpt-4-turbo-preview", max_retries: int = 3):
         self.api_key = api_key
         self.model = model
         self.base_url = "https://api.openai.com/v1/chat/completions"
 
-    async def generate(
+        self.max_retries = max_retries
+
+        # Shared client so connections (and TLS sessions) are reused across calls
+        self._client = build_http_client()
+
+    def _payload(
             self,
             prompt: str,
             response_schema: Dict[str, Any],
-            temperature: float = 0.7,
-            max_tokens: int = 1000
-    ) -> str:
-        """Call OpenAI API with JSON mode"""
-
-        # Add schema to system message
-        system_prompt = f"""You are a data insights analyst. You must respond with valid JSON matching this schema:
-{json.dumps(response_schema, indent=2)}
-
-Return ONLY valid JSON, no markdown formatting."""
+            temperature: float,
+            max_tokens: int,
+            system_prompt: Optional[str]
+    ) -> Dict[str, Any]:
+        # Static instructions and schema lead the system message, so the
+        # prefix stays identical across requests for prompt caching
+        system_content = _system_prompt.get(response_schema)
+        if system_prompt:
+            system_content = f"{system_prompt}\n\n{system_content}"
 
-        payload = {
+        return {
             "model": self.model,
             "messages": [
-                {"role": "system", "content": system_prompt},
+                {"role": "system", "content": system_content},
                 {"role": "user", "content": prompt}
             ],
             "temperature": temperature,
@@ -36,22 +49,54 @@ Return ONLY valid JSON, no markdown formatting."""
             "response_format": {"type": "json_object"}
         }
 
-        headers = {
+    def _headers(self) -> Dict[str, str]:
+        return {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.api_key}"
         }
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                self.base_url,
-                json=payload,
-                headers=headers
-            )
-            response.raise_for_status()
+    @cache_response
+    async def generate(
+            self,
+            prompt: str,
+            response_schema: Dict[str, Any],
+            temperature: float = 0.7,
+            max_tokens: int = 1000,
+            system_prompt: Optional[str] = None
+    ) -> str:
+        """Call OpenAI API with JSON mode"""
+        response = await post_with_retry(
+            self._client,
+            self.base_url,
+            max_attempts=self.max_retries,
+            json=self._payload(prompt, response_schema, temperature, max_tokens, system_prompt),
+            headers=self._headers()
+        )
 
-            data = response.json()
-            content = data["choices"][0]["message"]["content"]
-            return content
+        data = response.json()
+        content = data["choices"][0]["message"]["content"]
+        return content
+
+    async def stream(
+            self,
+            prompt: str,
+            response_schema: Dict[str, Any],
+            temperature: float = 0.7,
+            max_tokens: int = 1000,
+            system_prompt: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Stream the JSON-mode completion as content deltas"""
+        payload = self._payload(prompt, response_schema, temperature, max_tokens, system_prompt)
+        payload["stream"] = True
+
+        async for event in post_sse(self._client, self.base_url, json=payload, headers=self._headers()):
+            for choice in event.get("choices", []):
+                content = choice.get("delta", {}).get("content")
+                if content:
+                    yield content
 
     def get_model_name(self) -> str:
         return self.model
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
@@ -1,6 +1,10 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import QueuePool
+from sqlalchemy.pool import NullPool, QueuePool
+from typing import AsyncIterator
+from uuid import uuid4
 from app.models.database import Base
 from app.config import get_settings
 import logging
@@ -14,14 +18,39 @@ class Database:
     def __init__(self):
         settings = get_settings()
 
-        # Create engine with connection pooling
+        # PgBouncer owns connection pooling in transaction mode, so the app
+        # opens plain connections and avoids server-side prepared statements
+        if settings.database_use_pgbouncer:
+            sync_pool_options = {"poolclass": NullPool}
+            async_pool_options = {"poolclass": NullPool}
+            async_connect_args = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__"
+            }
+        else:
+            sync_pool_options = {
+                "poolclass": QueuePool,
+                "pool_size": 10,
+                "max_overflow": 20,
+                "pool_pre_ping": True  # Verify connections before using
+            }
+            async_pool_options = {
+                "pool_size": 20,
+                "max_overflow": 10,
+                "pool_pre_ping": True,
+                "pool_timeout": 30
+            }
+            async_connect_args = {
+                "statement_cache_size": 100,  # asyncpg prepared statement cache
+                "server_settings": {"jit": "off"}  # Predictable latency for short queries
+            }
+
+        # Sync engine - used by scripts, migrations and maintenance tasks
         self.engine = create_engine(
             settings.database_url,
-            poolclass=QueuePool,
-            pool_size=10,
-            max_overflow=20,
-            pool_pre_ping=True,  # Verify connections before using
-            echo=settings.log_level == "DEBUG"
+            echo=settings.log_level == "DEBUG",
+            **sync_pool_options
         )
 
         # Create session factory
@@ -31,6 +60,23 @@ class Database:
             bind=self.engine
         )
 
+        # Async engine (asyncpg) - used on the request path so DB waits
+        # don't block the event loop
+        self.async_engine = create_async_engine(
+            make_url(settings.database_url).set(drivername="postgresql+asyncpg"),
+            echo=settings.log_level == "DEBUG",
+            connect_args=async_connect_args,
+            **async_pool_options
+        )
+
+        # Create async session factory
+        self.AsyncSessionLocal = async_sessionmaker(
+            bind=self.async_engine,
+            class_=AsyncSession,
+            autoflush=False,
+            expire_on_commit=False
+        )
+
     def create_tables(self):
         """Create all tables in the database"""
         logger.info("Creating database tables...")
@@ -41,18 +87,19 @@ class Database:
         """Get a database session"""
         return self.SessionLocal()
 
+    def get_async_session(self) -> AsyncSession:
+        """Get an async database session"""
+        return self.AsyncSessionLocal()
+
 
 # Global database instance
 db = Database()
 
 
-def get_db() -> Session:
+async def get_db() -> AsyncIterator[AsyncSession]:
     """
-    Dependency for FastAPI routes to get database session.
+    Dependency for FastAPI routes to get an async database session.
     Automatically closes session after request.
     """
-    session = db.get_session()
-    try:
+    async with db.get_async_session() as session:
         yield session
-    finally:
-        session.close()
\ No newline at end of file
@@ -1,9 +1,10 @@
-from fastapi import FastAPI, Request
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from slowapi import _rate_limit_exceeded_handler
-from slowapi.errors import RateLimitExceeded
+from fastapi.responses import ORJSONResponse
 from app.api.routes import insights, mock_llm, async_insights, monitoring
+from app.api.dependencies import close_llm_client
+from app.utils.compression import SelectiveGZipMiddleware
 from app.utils.rate_limiter import limiter
 from app.config import get_settings
 import logging
@@ -15,15 +16,24 @@ logging.basicConfig(
 
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Release pooled LLM provider connections on shutdown
+    await close_llm_client()
+
+
 app = FastAPI(
     title="Pythia AI Insights Service",
     description="AI-powered data insights and anomaly detection",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Add rate limiting
 app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
 # CORS middleware
 app.add_middleware(
@@ -34,15 +44,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger responses (history pages, batch status lists); SSE streams are left as-is
+app.add_middleware(SelectiveGZipMiddleware, minimum_size=1024, compresslevel=4)
+
 # Register routers
 app.include_router(insights.router)
 app.include_router(mock_llm.router)
 app.include_router(async_insights.router)
 app.include_router(monitoring.router)
 
-@app.get("/health")
-@limiter.limit("100/minute")  # Rate limit health checks too
-async def health_check(request: Request):
+@app.get("/health", dependencies=[Depends(limiter.limit("100/minute"))])  # Rate limit health checks too
+async def health_check():
     return {
         "status": "healthy",
         "llm_provider": settings.llm_provider,
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Float, Boolean, DateTime, Index, text
+from sqlalchemy import Column, Computed, String, Text, Float, Boolean, DateTime, Index, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
@@ -36,8 +36,11 @@ class Insight(Base):
     # LLM generated output
     llm_output = Column(JSONB, nullable=False)
 
+    # Severity extracted by Postgres on write, so filters can use a plain index
+    severity_cached = Column(Text, Computed("llm_output->>'severity'", persisted=True))
+
     # Metadata - CHANGED FROM 'metadata' to 'insight_metadata'
-    insight_metadata = Column(JSONB, nullable=False, default={})
+    insight_metadata = Column("metadata", JSONB, nullable=False, default={})
     fallback_used = Column(Boolean, default=False)
 
     # Processing info
@@ -49,9 +52,15 @@ class Insight(Base):
 
     # Indexes for performance
     __table_args__ = (
-        Index('idx_user_tenant_created', 'user_id', 'tenant_id', 'created_at'),
+        Index('ix_insight_user_tenant_created', 'user_id', 'tenant_id',
+              text('created_at DESC'), text('insight_id DESC')),
+        Index('ix_insight_user_tenant_severity_created', 'user_id', 'tenant_id', 'severity_cached',
+              text('created_at DESC'), text('insight_id DESC')),
         Index('idx_tenant_severity', 'tenant_id', text("(llm_output->>'severity')"), 'created_at'),
         Index('idx_created_at', 'created_at'),
+        Index('idx_insights_created_brin', 'created_at', postgresql_using='brin'),
+        Index('ix_insight_severity', 'severity_cached'),
+        Index('ix_insight_confidence', text("(CAST(llm_output->>'confidence' AS FLOAT))")),
     )
 
     def to_dict(self):
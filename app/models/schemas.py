@@ -1,14 +1,17 @@
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, ValidationInfo, field_validator
 from typing import List, Optional, Dict, Any, Literal
 from datetime import datetime
 from uuid import UUID, uuid4
 
 
+Severity = Literal["critical", "high", "medium", "low"]
+
+
 # ===== Request Schemas =====
 
 class MetricsData(BaseModel):
     metric_name: str
-    values: List[float] = Field(..., min_items=2)
+    values: List[float] = Field(..., min_length=2)
     timestamps: Optional[List[datetime]] = None
 
 
@@ -23,7 +26,7 @@ class TimeSeriesPoint(BaseModel):
 
 class TimeSeriesData(BaseModel):
     series_name: str
-    data_points: List[TimeSeriesPoint] = Field(..., min_items=2)
+    data_points: List[TimeSeriesPoint] = Field(..., min_length=2)
 
 
 class ContextConfig(BaseModel):
@@ -31,6 +34,13 @@ class ContextConfig(BaseModel):
     thresholds: Optional[Dict[str, float]] = None
 
 
+_DATA_MODELS = {
+    "metrics": MetricsData,
+    "text": TextData,
+    "timeseries": TimeSeriesData
+}
+
+
 class InsightRequest(BaseModel):
     user_id: str
     tenant_id: str
@@ -38,19 +48,17 @@ class InsightRequest(BaseModel):
     data: Dict[str, Any]  # Will be validated based on input_type
     context: Optional[ContextConfig] = None
 
-    @validator('data')
-    def validate_data_format(cls, v, values):
-        input_type = values.get('input_type')
+    @field_validator('data')
+    @classmethod
+    def validate_data_format(cls, v: Dict[str, Any], info: ValidationInfo) -> Dict[str, Any]:
+        input_type = info.data.get('input_type')
+        data_model = _DATA_MODELS.get(input_type)
+        if data_model is None:
+            return v
         try:
-            if input_type == 'metrics':
-                return MetricsData(**v).dict()
-            elif input_type == 'text':
-                return TextData(**v).dict()
-            elif input_type == 'timeseries':
-                return TimeSeriesData(**v).dict()
-        except Exception as e:
+            return data_model.model_validate(v).model_dump()
+        except ValidationError as e:
             raise ValueError(f"Invalid data format for {input_type}: {str(e)}")
-        return v
 
 
 # ===== Response Schemas =====
@@ -60,12 +68,12 @@ class FeatureSet(BaseModel):
     current_value: float
     change_absolute: float
     change_percent: float
-    severity: Literal["critical", "high", "medium", "low"]
+    severity: Severity
 
 
 class InsightOutput(BaseModel):
     summary: str
-    severity: Literal["critical", "high", "medium", "low"]
+    severity: Severity
     confidence: float = Field(ge=0.0, le=1.0)
     recommended_actions: List[str]
     key_findings: List[str]
@@ -78,6 +86,8 @@ class InputSummary(BaseModel):
 
 
 class ResponseMetadata(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+
     processing_time_ms: int
     llm_provider: str
     model_version: str
@@ -109,7 +119,14 @@ class InsightHistoryItem(BaseModel):
 class InsightHistoryResponse(BaseModel):
     user_id: str
     tenant_id: str
-    total_count: int
+    total_count: Optional[int] = None  # See /insight-history/{user_id}/count
     returned_count: int
     insights: List[InsightHistoryItem]
     pagination: Dict[str, Any]
+
+
+class InsightCountResponse(BaseModel):
+    user_id: str
+    tenant_id: str
+    severity: Optional[Severity] = None
+    total_count: int
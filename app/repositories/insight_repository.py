@@ -1,21 +1,69 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Float, desc, func, insert, lambda_stmt, select, tuple_
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import raiseload
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.lambdas import StatementLambdaElement
+from typing import Any, AsyncIterator, Dict, List, Optional
 from datetime import datetime
+from uuid import UUID
 from app.models.database import Insight
 from app.models.schemas import InsightResponse, InsightHistoryItem
 import logging
 
 logger = logging.getLogger(__name__)
 
+# History projection - JSONB extraction and truncation run in Postgres
+_HISTORY_COLUMNS = (
+    Insight.insight_id,
+    Insight.created_at.label("timestamp"),
+    func.coalesce(Insight.input_data['metric_name'].astext, 'Unknown').label("metric_name"),
+    func.coalesce(Insight.severity_cached, 'low').label("severity"),
+    func.coalesce(
+        func.substr(Insight.llm_output['summary'].astext, 1, 200), ''
+    ).label("summary"),
+    func.coalesce(
+        Insight.features['change_percent'].astext.cast(Float), 0.0
+    ).label("change_percent")
+)
+
 
 class InsightRepository:
     """Repository pattern for Insight database operations"""
 
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         self.session = session
 
-    def create(self, insight_data: InsightResponse) -> Insight:
+    @staticmethod
+    def _to_row(insight_data: InsightResponse) -> Dict[str, Any]:
+        """Map an InsightResponse onto Insight column values"""
+        # One dump of the whole response; nested models come out as plain dicts
+        return InsightRepository._row_from_dump(insight_data.model_dump())
+
+    @staticmethod
+    def _row_from_dump(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Map a dumped InsightResponse onto Insight column values"""
+        input_summary = data["input_summary"]
+        metadata = data["metadata"]
+        return {
+            "insight_id": data["insight_id"],
+            "user_id": data["user_id"],
+            "tenant_id": data["tenant_id"],
+            "input_type": input_summary["metric_name"],  # Simplified
+            "input_data": {
+                "metric_name": input_summary["metric_name"],
+                "data_points_count": input_summary["data_points_count"]
+            },
+            "features": data["features"],
+            "llm_output": data["insight"],
+            "insight_metadata": metadata,
+            "fallback_used": metadata["fallback_used"],
+            "processing_time_ms": metadata["processing_time_ms"],
+            "llm_provider": metadata["llm_provider"],
+            "created_at": data["timestamp"]
+        }
+
+    async def create(self, insight_data: InsightResponse) -> Insight:
         """
         Create a new insight record in the database.
 
@@ -25,85 +73,189 @@ class InsightRepository:
         Returns:
             Created Insight model
         """
-        insight = Insight(
-            insight_id=insight_data.insight_id,
-            user_id=insight_data.user_id,
-            tenant_id=insight_data.tenant_id,
-            input_type=insight_data.input_summary.metric_name,  # Simplified
-            input_data={
-                "metric_name": insight_data.input_summary.metric_name,
-                "data_points_count": insight_data.input_summary.data_points_count
-            },
-            features=insight_data.features.dict(),
-            llm_output=insight_data.insight.dict(),
-            metadata=insight_data.metadata.dict(),
-            fallback_used=insight_data.metadata.fallback_used,
-            processing_time_ms=insight_data.metadata.processing_time_ms,
-            llm_provider=insight_data.metadata.llm_provider,
-            created_at=insight_data.timestamp
-        )
+        # Every column is set client-side (including the UUID), so no refresh is needed
+        insight = Insight(**self._to_row(insight_data))
 
         self.session.add(insight)
-        self.session.commit()
-        self.session.refresh(insight)
+        await self.session.commit()
 
         logger.info(f"Insight {insight.insight_id} saved to database")
         return insight
 
-    def get_by_id(self, insight_id: str) -> Optional[Insight]:
+    async def create_many(self, insights: List[InsightResponse]) -> int:
+        """
+        Insert several insights in one statement and one commit.
+
+        Uses an executemany-style bulk INSERT, which SQLAlchemy batches into
+        multi-row VALUES with a statement that compiles once for any batch size.
+
+        Returns:
+            Number of rows inserted
+        """
+        if not insights:
+            return 0
+
+        await self.session.execute(
+            insert(Insight),
+            [self._to_row(item) for item in insights]
+        )
+        await self.session.commit()
+
+        logger.info(f"{len(insights)} insights saved to database")
+        return len(insights)
+
+    async def create_many_serialized(self, dumps: List[Dict[str, Any]]) -> int:
+        """
+        Insert insights from JSON-mode dumps (InsightResponse.model_dump(mode='json')),
+        as shipped through Celery, without rebuilding the response models.
+
+        Returns:
+            Number of rows inserted
+        """
+        if not dumps:
+            return 0
+
+        rows = []
+        for data in dumps:
+            row = self._row_from_dump(data)
+            row["insight_id"] = UUID(row["insight_id"])
+            row["created_at"] = datetime.fromisoformat(row["created_at"])
+            rows.append(row)
+
+        await self.session.execute(insert(Insight), rows)
+        await self.session.commit()
+
+        logger.info(f"{len(rows)} insights saved to database")
+        return len(rows)
+
+    async def get_by_id(self, insight_id: str) -> Optional[Insight]:
         """Get insight by ID"""
-        return self.session.query(Insight).filter(
-            Insight.insight_id == insight_id
-        ).first()
+        result = await self.session.execute(
+            select(Insight).where(Insight.insight_id == insight_id)
+        )
+        return result.scalars().first()
+
+    @staticmethod
+    def _with_history_filters(
+            stmt: StatementLambdaElement,
+            severity: Optional[str],
+            start_date: Optional[datetime],
+            end_date: Optional[datetime]
+    ) -> StatementLambdaElement:
+        """Add the optional history filters; each lambda's SQL is cached by SQLAlchemy"""
+        if severity:
+            stmt += lambda s: s.where(Insight.severity_cached == severity)
+
+        if start_date:
+            stmt += lambda s: s.where(Insight.created_at >= start_date)
+
+        if end_date:
+            stmt += lambda s: s.where(Insight.created_at <= end_date)
+
+        return stmt
 
-    def get_by_user(
+    async def get_by_user(
             self,
             user_id: str,
             tenant_id: str,
             limit: int = 50,
-            offset: int = 0,
             severity: Optional[str] = None,
             start_date: Optional[datetime] = None,
-            end_date: Optional[datetime] = None
-    ) -> tuple[List[Insight], int]:
+            end_date: Optional[datetime] = None,
+            cursor_created_at: Optional[datetime] = None,
+            cursor_id: Optional[UUID] = None
+    ) -> tuple[List[Row], bool]:
         """
-        Get insights for a user with filtering and pagination.
+        Get a page of insight history rows for a user, newest first.
+
+        Only the fields shown in history are selected; JSONB extraction and
+        summary truncation happen in Postgres so just scalars are returned.
+        Row keys match InsightHistoryItem.
+
+        Pages use keyset pagination on (created_at, insight_id): pass the last
+        row's timestamp and insight_id as the cursor to get the next page.
+        Statements are built with lambda_stmt, so the compiled SQL is cached
+        and only parameter values change between calls.
 
         Returns:
-            Tuple of (insights list, total count)
+            Tuple of (history rows, whether more rows follow)
         """
-        # Base query with tenant isolation
-        query = self.session.query(Insight).filter(
-            Insight.user_id == user_id,
-            Insight.tenant_id == tenant_id
+        # Tenant isolation
+        stmt = lambda_stmt(
+            lambda: select(*_HISTORY_COLUMNS).where(
+                Insight.user_id == user_id,
+                Insight.tenant_id == tenant_id
+            )
         )
+        stmt = self._with_history_filters(stmt, severity, start_date, end_date)
 
-        # Apply filters
-        if severity:
-            query = query.filter(
-                Insight.llm_output['severity'].astext == severity
+        if cursor_created_at is not None and cursor_id is not None:
+            stmt += lambda s: s.where(
+                tuple_(Insight.created_at, Insight.insight_id) < tuple_(cursor_created_at, cursor_id)
             )
 
-        if start_date:
-            query = query.filter(Insight.created_at >= start_date)
+        # One extra row tells us whether there is a next page
+        fetch_size = limit + 1
+        stmt += lambda s: s.order_by(
+            desc(Insight.created_at), desc(Insight.insight_id)
+        ).limit(fetch_size)
 
-        if end_date:
-            query = query.filter(Insight.created_at <= end_date)
+        rows = list((await self.session.execute(stmt)).all())
 
-        # Get total count before pagination
-        total_count = query.count()
+        return rows[:limit], len(rows) > limit
 
-        # Apply pagination and ordering
-        insights = query.order_by(
-            desc(Insight.created_at)
-        ).limit(limit).offset(offset).all()
+    async def count_by_user(
+            self,
+            user_id: str,
+            tenant_id: str,
+            severity: Optional[str] = None,
+            start_date: Optional[datetime] = None,
+            end_date: Optional[datetime] = None
+    ) -> int:
+        """Count a user's insights matching the history filters"""
+        stmt = lambda_stmt(
+            lambda: select(func.count()).select_from(Insight).where(
+                Insight.user_id == user_id,
+                Insight.tenant_id == tenant_id
+            )
+        )
+        stmt = self._with_history_filters(stmt, severity, start_date, end_date)
 
-        return insights, total_count
+        return await self.session.scalar(stmt)
 
-    def get_recent_by_tenant(self, tenant_id: str, limit: int = 100) -> List[Insight]:
+    async def get_recent_by_tenant(self, tenant_id: str, limit: int = 100) -> List[Insight]:
         """Get recent insights for a tenant (for monitoring/analytics)"""
-        return self.session.query(Insight).filter(
+        result = await self.session.execute(
+            self._recent_by_tenant_query(tenant_id).limit(limit)
+        )
+        return list(result.scalars().all())
+
+    async def stream_recent_by_tenant(
+            self,
+            tenant_id: str,
+            limit: Optional[int] = None,
+            chunk_size: int = 200
+    ) -> AsyncIterator[Insight]:
+        """
+        Iterate a tenant's insights, newest first, over a server-side cursor.
+        Rows are fetched `chunk_size` at a time instead of materialized at once,
+        for exports and analytics over large tenants.
+        """
+        query = self._recent_by_tenant_query(tenant_id)
+        if limit is not None:
+            query = query.limit(limit)
+
+        result = await self.session.stream(
+            query.execution_options(yield_per=chunk_size)
+        )
+        async for insight in result.scalars():
+            yield insight
+
+    @staticmethod
+    def _recent_by_tenant_query(tenant_id: str) -> Select:
+        # raiseload guards against accidental lazy loads (N+1) on these wide rows
+        return select(Insight).options(raiseload("*")).where(
             Insight.tenant_id == tenant_id
         ).order_by(
             desc(Insight.created_at)
-        ).limit(limit).all()
+        )
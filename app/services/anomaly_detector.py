@@ -1,7 +1,71 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 import numpy as np
 from dataclasses import dataclass
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional - kernels run as plain Python
+    def njit(*args, **kwargs):
+        return lambda func: func
+
+
+# ===== Numeric kernels =====
+# Inputs are float64 arrays - float32 can't tell apart values that differ by
+# less than 1 part in 2^24, which hides spikes on large-magnitude metrics.
+# Each kernel makes a single pass where possible
+
+@njit(cache=True)
+def _mean_std_kernel(arr: np.ndarray) -> Tuple[float, float]:
+    """Mean and population std in one pass (Welford's algorithm)"""
+    mean = 0.0
+    m2 = 0.0
+    for i in range(arr.shape[0]):
+        delta = arr[i] - mean
+        mean += delta / (i + 1)
+        m2 += delta * (arr[i] - mean)
+    return mean, np.sqrt(m2 / arr.shape[0])
+
+
+@njit(cache=True)
+def _zscore_kernel(arr: np.ndarray) -> Tuple[float, float, float]:
+    """Mean, std and z-score of the last value"""
+    mean, std = _mean_std_kernel(arr)
+    z = (arr[-1] - mean) / std if std > 0 else 0.0
+    return mean, std, z
+
+
+@njit(cache=True)
+def _rolling_kernel(arr: np.ndarray, window: int) -> Tuple[float, float]:
+    """Mean and std of the `window` values before the last one"""
+    return _mean_std_kernel(arr[-(window + 1):-1])
+
+
+@njit(cache=True)
+def _percentile_sorted(sorted_arr: np.ndarray, q: float) -> float:
+    """Linear-interpolated percentile of a sorted array (matches np.percentile)"""
+    pos = q / 100.0 * (sorted_arr.shape[0] - 1)
+    lo = int(np.floor(pos))
+    hi = min(lo + 1, sorted_arr.shape[0] - 1)
+    return sorted_arr[lo] + (sorted_arr[hi] - sorted_arr[lo]) * (pos - lo)
+
+
+@njit(cache=True)
+def _iqr_kernel(arr: np.ndarray) -> Tuple[float, float, float]:
+    """Q1, median and Q3 from a single sort"""
+    sorted_arr = np.sort(arr)
+    return (
+        _percentile_sorted(sorted_arr, 25.0),
+        _percentile_sorted(sorted_arr, 50.0),
+        _percentile_sorted(sorted_arr, 75.0)
+    )
+
+
+# Compile once at import instead of on the first request
+_warmup = np.array([1.0, 2.0, 3.0, 4.0])
+_zscore_kernel(_warmup)
+_rolling_kernel(_warmup, 2)
+_iqr_kernel(_warmup)
+
 
 @dataclass
 class AnomalyResult:
@@ -44,9 +108,7 @@ class AnomalyDetector:
             )
 
         # Calculate statistics
-        arr = np.array(values)
-        mean = np.mean(arr)
-        std = np.std(arr)
+        mean, std, z_score = _zscore_kernel(np.asarray(values, dtype=np.float64))
 
         # Handle zero standard deviation
         if std == 0:
@@ -63,8 +125,6 @@ class AnomalyDetector:
 
         # Z-score of the last value
         current_value = values[-1]
-        z_score = (current_value - mean) / std
-
         is_anomaly = abs(z_score) > threshold
 
         return AnomalyResult(
@@ -110,12 +170,8 @@ class AnomalyDetector:
                 details={"error": f"Need at least {window + 1} values"}
             )
 
-        arr = np.array(values)
-
         # Calculate rolling statistics (excluding last value)
-        rolling_window = arr[-(window + 1):-1]
-        rolling_mean = np.mean(rolling_window)
-        rolling_std = np.std(rolling_window)
+        rolling_mean, rolling_std = _rolling_kernel(np.asarray(values, dtype=np.float64), window)
 
         if rolling_std == 0:
             return AnomalyResult(
@@ -138,7 +194,7 @@ class AnomalyDetector:
 
         return AnomalyResult(
             is_anomaly=is_anomaly,
-            z_score=deviation / rolling_std,
+            z_score=float(deviation / rolling_std),
             method="rolling_std",
             details={
                 "rolling_mean": float(rolling_mean),
@@ -178,9 +234,7 @@ class AnomalyDetector:
                 details={"error": "Need at least 4 values for IQR"}
             )
 
-        arr = np.array(values)
-        q1 = np.percentile(arr, 25)
-        q3 = np.percentile(arr, 75)
+        q1, median, q3 = _iqr_kernel(np.asarray(values, dtype=np.float64))
         iqr = q3 - q1
 
         lower_bound = q1 - (multiplier * iqr)
@@ -190,7 +244,6 @@ class AnomalyDetector:
         is_anomaly = current_value < lower_bound or current_value > upper_bound
 
         # Calculate "z-score equivalent" for consistency
-        median = np.median(arr)
         z_equiv = abs(current_value - median) / (iqr / 1.35) if iqr > 0 else 0
 
         return AnomalyResult(
@@ -1,22 +1,54 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Float, case, func, desc, select
 from app.models.database import Insight
-from datetime import datetime, timedelta
-from typing import Dict, List
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+SECONDS_PER_HOUR = 3600
+SECONDS_PER_DAY = 86400
+
+
+@lru_cache(maxsize=8)
+def _cutoff_for_hour(hour_bucket: int, days: int) -> datetime:
+    """Naive UTC start of a `days` window ending at the start of `hour_bucket`"""
+    return datetime.utcfromtimestamp(hour_bucket * SECONDS_PER_HOUR - days * SECONDS_PER_DAY)
+
+
+def _window_start(days: int) -> datetime:
+    """
+    Cutoff for a `days` look-back window, rounded down to the hour.
+
+    Drift stats are polled by dashboards, so the cutoff is only rebuilt
+    once per hour per window size.
+    """
+    return _cutoff_for_hour(int(time.time() // SECONDS_PER_HOUR), days)
+
+
+@lru_cache(maxsize=128)
+def _version_recommendation(conf_a: float, conf_b: float) -> str:
+    """A/B recommendation for two average confidences (already rounded to 3 places)"""
+    if conf_b > conf_a * 1.1:
+        return f"Version B is significantly better (+{((conf_b / conf_a - 1) * 100):.1f}% confidence)"
+    elif conf_a > conf_b * 1.1:
+        return "Version A is better. Keep current version."
+    else:
+        return "No significant difference. Choose based on other factors."
+
 
 class DriftMonitor:
     """
     Monitor model drift by comparing LLM outputs to rule-based baselines.
     """
 
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         self.session = session
 
-    def detect_drift(
+    async def detect_drift(
             self,
             days: int = 7,
             disagreement_threshold: float = 0.3
@@ -31,45 +63,55 @@ class DriftMonitor:
         Returns:
             Dictionary with drift metrics
         """
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
-
-        # Get recent insights
-        insights = self.session.query(Insight).filter(
-            Insight.created_at >= cutoff_date
-        ).all()
-
-        if not insights:
+        cutoff_date = _window_start(days)
+
+        rule_severity = func.coalesce(Insight.features['severity'].astext, 'unknown')
+        llm_severity = func.coalesce(Insight.severity_cached, 'unknown')
+        llm_confidence = func.coalesce(Insight.llm_output['confidence'].astext.cast(Float), 0.0)
+        in_window = Insight.created_at >= cutoff_date
+
+        # Count disagreements and low confidence server-side in one scan
+        counts = (await self.session.execute(
+            select(
+                func.count().label('total'),
+                func.coalesce(func.sum(case((rule_severity != llm_severity, 1), else_=0)), 0).label('disagreements'),
+                func.coalesce(func.sum(case((llm_confidence < 0.5, 1), else_=0)), 0).label('low_confidence')
+            ).where(in_window)
+        )).one()
+
+        total = counts.total
+        if not total:
             return {
                 "status": "no_data",
                 "message": "Not enough data to detect drift"
             }
 
-        total = len(insights)
-        disagreements = 0
+        disagreements = counts.disagreements
+
+        # Fetch a small sample of mismatches only when there are any
         severity_mismatches = []
-        confidence_drop = []
-
-        for insight in insights:
-            rule_severity = insight.features.get('severity', 'unknown')
-            llm_severity = insight.llm_output.get('severity', 'unknown')
-            llm_confidence = insight.llm_output.get('confidence', 0.0)
-
-            # Track disagreements
-            if rule_severity != llm_severity:
-                disagreements += 1
-                severity_mismatches.append({
-                    "insight_id": str(insight.insight_id),
-                    "rule_severity": rule_severity,
-                    "llm_severity": llm_severity,
-                    "created_at": insight.created_at.isoformat()
-                })
-
-            # Track low confidence
-            if llm_confidence < 0.5:
-                confidence_drop.append({
-                    "insight_id": str(insight.insight_id),
-                    "confidence": llm_confidence
-                })
+        if disagreements:
+            mismatch_rows = (await self.session.execute(
+                select(
+                    Insight.insight_id,
+                    rule_severity.label('rule_severity'),
+                    llm_severity.label('llm_severity'),
+                    Insight.created_at
+                ).where(
+                    in_window,
+                    rule_severity != llm_severity
+                ).limit(10)
+            )).all()
+
+            severity_mismatches = [
+                {
+                    "insight_id": str(r.insight_id),
+                    "rule_severity": r.rule_severity,
+                    "llm_severity": r.llm_severity,
+                    "created_at": r.created_at.isoformat()
+                }
+                for r in mismatch_rows
+            ]
 
         drift_rate = disagreements / total if total > 0 else 0
 
@@ -83,8 +125,8 @@ class DriftMonitor:
             "disagreements": disagreements,
             "threshold": disagreement_threshold,
             "period_days": days,
-            "low_confidence_count": len(confidence_drop),
-            "severity_mismatches": severity_mismatches[:10],  # Top 10
+            "low_confidence_count": counts.low_confidence,
+            "severity_mismatches": severity_mismatches,  # Up to 10
             "recommendation": self._get_recommendation(drift_rate, disagreement_threshold)
         }
 
@@ -104,26 +146,28 @@ class DriftMonitor:
         else:
             return "URGENT: Major drift detected. Review LLM provider updates and consider prompt retraining."
 
-    def get_output_distribution(self, days: int = 30) -> Dict:
+    async def get_output_distribution(self, days: int = 30) -> Dict:
         """
         Analyze distribution of LLM outputs over time.
         Useful for detecting quality degradation.
         """
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
+        cutoff_date = _window_start(days)
 
         # Query aggregated metrics
-        results = self.session.query(
-            func.date(Insight.created_at).label('date'),
-            func.avg(func.length(Insight.llm_output['summary'].astext)).label('avg_summary_length'),
-            func.avg((Insight.llm_output['confidence'].astext.cast(float))).label('avg_confidence'),
-            func.count().label('count')
-        ).filter(
-            Insight.created_at >= cutoff_date
-        ).group_by(
-            func.date(Insight.created_at)
-        ).order_by(
-            desc('date')
-        ).all()
+        results = (await self.session.execute(
+            select(
+                func.date(Insight.created_at).label('date'),
+                func.avg(func.length(Insight.llm_output['summary'].astext)).label('avg_summary_length'),
+                func.avg((Insight.llm_output['confidence'].astext.cast(Float))).label('avg_confidence'),
+                func.count().label('count')
+            ).where(
+                Insight.created_at >= cutoff_date
+            ).group_by(
+                func.date(Insight.created_at)
+            ).order_by(
+                desc('date')
+            )
+        )).all()
 
         return {
             "period_days": days,
@@ -138,7 +182,7 @@ class DriftMonitor:
             ]
         }
 
-    def compare_prompt_versions(
+    async def compare_prompt_versions(
             self,
             version_a: str,
             version_b: str,
@@ -149,45 +193,52 @@ class DriftMonitor:
 
         Requires storing prompt_version in metadata.
         """
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
-
-        # Get insights for each version
-        version_a_insights = self.session.query(Insight).filter(
-            Insight.created_at >= cutoff_date,
-            Insight.metadata['prompt_version'].astext == version_a
-        ).all()
-
-        version_b_insights = self.session.query(Insight).filter(
-            Insight.created_at >= cutoff_date,
-            Insight.metadata['prompt_version'].astext == version_b
-        ).all()
+        cutoff_date = _window_start(days)
+
+        prompt_version = Insight.insight_metadata['prompt_version'].astext
+        confidence = func.coalesce(Insight.llm_output['confidence'].astext.cast(Float), 0.0)
+
+        # Aggregate both versions server-side in one grouped query
+        rows = (await self.session.execute(
+            select(
+                prompt_version.label('version'),
+                func.count().label('count'),
+                func.avg(confidence).label('avg_confidence'),
+                func.avg(Insight.processing_time_ms).label('avg_processing_time_ms'),
+                func.sum(case((Insight.fallback_used, 1), else_=0)).label('fallback_count')
+            )
+            .where(
+                Insight.created_at >= cutoff_date,
+                prompt_version.in_([version_a, version_b])
+            )
+            .group_by(prompt_version)
+        )).all()
+        by_version = {row.version: row for row in rows}
 
-        def analyze_version(insights: List[Insight]) -> Dict:
-            if not insights:
+        def analyze_version(version: str) -> Dict:
+            row = by_version.get(version)
+            if row is None:
                 return {"count": 0}
 
-            confidences = [i.llm_output.get('confidence', 0) for i in insights]
-            processing_times = [i.processing_time_ms for i in insights]
-            fallback_count = sum(1 for i in insights if i.fallback_used)
-
+            fallback_rate = row.fallback_count / row.count
             return {
-                "count": len(insights),
-                "avg_confidence": round(sum(confidences) / len(confidences), 3),
-                "avg_processing_time_ms": round(sum(processing_times) / len(processing_times), 1),
-                "fallback_rate": round(fallback_count / len(insights), 3),
-                "success_rate": round(1 - (fallback_count / len(insights)), 3)
+                "count": row.count,
+                "avg_confidence": round(float(row.avg_confidence), 3),
+                "avg_processing_time_ms": round(float(row.avg_processing_time_ms or 0), 1),
+                "fallback_rate": round(fallback_rate, 3),
+                "success_rate": round(1 - fallback_rate, 3)
             }
 
+        metrics_a = analyze_version(version_a)
+        metrics_b = analyze_version(version_b)
+
         return {
             "version_a": version_a,
-            "version_a_metrics": analyze_version(version_a_insights),
+            "version_a_metrics": metrics_a,
             "version_b": version_b,
-            "version_b_metrics": analyze_version(version_b_insights),
+            "version_b_metrics": metrics_b,
             "period_days": days,
-            "recommendation": self._compare_versions(
-                analyze_version(version_a_insights),
-                analyze_version(version_b_insights)
-            )
+            "recommendation": self._compare_versions(metrics_a, metrics_b)
         }
 
     def _compare_versions(self, metrics_a: Dict, metrics_b: Dict) -> str:
@@ -195,12 +246,7 @@ class DriftMonitor:
         if metrics_a.get("count", 0) < 100 or metrics_b.get("count", 0) < 100:
             return "Need more data (min 100 samples each)"
 
-        conf_a = metrics_a.get("avg_confidence", 0)
-        conf_b = metrics_b.get("avg_confidence", 0)
-
-        if conf_b > conf_a * 1.1:
-            return f"Version B is significantly better (+{((conf_b / conf_a - 1) * 100):.1f}% confidence)"
-        elif conf_a > conf_b * 1.1:
-            return "Version A is better. Keep current version."
-        else:
-            return "No significant difference. Choose based on other factors."
\ No newline at end of file
+        return _version_recommendation(
+            metrics_a.get("avg_confidence", 0),
+            metrics_b.get("avg_confidence", 0)
+        )
\ No newline at end of file
@@ -1,12 +1,43 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
+from bisect import bisect_right
 from app.models.schemas import FeatureSet
 from app.config import Settings
+import re
+
+# Urgency keywords matched in a single case-insensitive pass over the text
+_URGENCY_RE = re.compile(r"urgent|critical|emergency|immediate", re.IGNORECASE)
+
+
+# Severity levels from most to least severe, with fallback thresholds
+# for levels missing from a request's context thresholds
+_SEVERITY_LEVELS = (("critical", 50), ("high", 25), ("medium", 10))
+
+# Labels in ascending order, indexed by how many severity bounds a change reaches
+_SEVERITY_LABELS = ("low", "medium", "high", "critical")
+
+
+def _severity_bounds(critical: float, high: float, medium: float) -> Tuple[float, float, float]:
+    """
+    Ascending (medium, high, critical) lower bounds for bisect lookups.
+
+    Each bound is capped by the ones above it, so out-of-order thresholds
+    classify exactly as the most-severe-first checks would.
+    """
+    high = min(high, critical)
+    return min(medium, high), high, critical
 
 
 class FeatureExtractor:
     def __init__(self, settings: Settings):
         self.settings = settings
 
+        # Configured severity bounds, built once
+        self._severity_bounds = _severity_bounds(
+            settings.severity_threshold_critical,
+            settings.severity_threshold_high,
+            settings.severity_threshold_medium
+        )
+
     def extract_from_metrics(self, values: List[float], context: Dict[str, Any] = None) -> FeatureSet:
         """
         Extract features from time-series metrics.
@@ -30,23 +61,16 @@ class FeatureExtractor:
             change_percent = (change_absolute / previous_value) * 100
 
         # Determine severity using configurable thresholds
-        thresholds = context.get('thresholds') if context else None
-        if thresholds is None:
-            thresholds = {
-                'critical': self.settings.severity_threshold_critical,
-                'high': self.settings.severity_threshold_high,
-                'medium': self.settings.severity_threshold_medium
-            }
-
-        abs_change = abs(change_percent)
-        if abs_change >= thresholds.get('critical', 50):
-            severity = "critical"
-        elif abs_change >= thresholds.get('high', 25):
-            severity = "high"
-        elif abs_change >= thresholds.get('medium', 10):
-            severity = "medium"
+        custom_thresholds = context.get('thresholds') if context else None
+        if custom_thresholds is None:
+            severity_bounds = self._severity_bounds
         else:
-            severity = "low"
+            severity_bounds = _severity_bounds(*(
+                custom_thresholds.get(level, default)
+                for level, default in _SEVERITY_LEVELS
+            ))
+
+        severity = _SEVERITY_LABELS[bisect_right(severity_bounds, abs(change_percent))]
 
         return FeatureSet(
             previous_value=previous_value,
@@ -65,8 +89,7 @@ class FeatureExtractor:
         word_count = len(text.split())
 
         # Mock severity based on urgency keywords
-        urgency_keywords = ['urgent', 'critical', 'emergency', 'immediate']
-        severity = "high" if any(kw in text.lower() for kw in urgency_keywords) else "medium"
+        severity = "high" if _URGENCY_RE.search(text) is not None else "medium"
 
         return FeatureSet(
             previous_value=0.0,
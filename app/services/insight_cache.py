@@ -0,0 +1,63 @@
+from hashlib import blake2b
+from typing import Optional
+from pydantic import ValidationError
+from redis.exceptions import RedisError
+from app.models.schemas import FeatureSet, InsightOutput
+from app.utils.redis_client import redis_client
+from app.services.anomaly_detector import AnomalyResult
+import orjson
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def insight_cache_key(
+        model: str,
+        input_type: str,
+        metric_name: str,
+        features: FeatureSet,
+        anomaly_result: Optional[AnomalyResult] = None
+) -> str:
+    """
+    Redis key for a generated insight: hash of the extracted features.
+    Requests whose features match (to 3 decimal places) share an insight.
+    """
+    canonical = orjson.dumps(
+        {
+            "model": model,
+            "input_type": input_type,
+            "metric": metric_name,
+            "current": round(features.current_value, 3),
+            "previous": round(features.previous_value, 3),
+            "severity": features.severity,
+            "anomaly": anomaly_result.is_anomaly if anomaly_result else None
+        },
+        option=orjson.OPT_SORT_KEYS
+    )
+    return f"insight:{blake2b(canonical, digest_size=16).hexdigest()}"
+
+
+async def get_cached_insight(key: str) -> Optional[InsightOutput]:
+    """Cached insight for a key, or None on a miss. Redis errors count as a miss."""
+    try:
+        cached = await redis_client.get(key)
+    except RedisError as e:
+        logger.warning(f"Insight cache unavailable: {e}")
+        return None
+
+    if cached is None:
+        return None
+
+    try:
+        return InsightOutput.model_validate_json(cached)
+    except ValidationError as e:
+        logger.warning(f"Discarding invalid cached insight {key}: {e}")
+        return None
+
+
+async def put_cached_insight(key: str, insight: InsightOutput, ttl_seconds: int) -> None:
+    """Cache an LLM-generated insight. Write failures are logged and ignored."""
+    try:
+        await redis_client.setex(key, ttl_seconds, insight.model_dump_json())
+    except RedisError as e:
+        logger.warning(f"Insight cache write failed: {e}")
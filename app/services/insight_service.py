@@ -1,20 +1,28 @@
-import json
 import time
-from typing import Dict, Any
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
 from pydantic import ValidationError
 from app.models.schemas import (
     InsightRequest, InsightResponse, FeatureSet,
     InsightOutput, InputSummary, ResponseMetadata
 )
 from app.clients.llm_base import LLMClient
+from app.clients.llm_cache import MAX_CACHEABLE_TEMPERATURE
 from app.services.feature_extractor import FeatureExtractor
 from app.services.prompt_builder import PromptBuilder
 from app.config import Settings
 from app.services.anomaly_detector import AnomalyDetector, AnomalyResult
+from app.services.insight_cache import insight_cache_key, get_cached_insight, put_cached_insight
+import httpx
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Fixed wording of the rule-based fallback insight, by direction of change
+_FALLBACK_INCREASE = ("increase", "Consult with relevant teams to investigate the cause of this growth")
+_FALLBACK_DECREASE = ("decrease", "Consult with relevant teams to identify factors driving this decline")
+_FALLBACK_DATA_QUALITY_ACTION = "Verify data quality and check for any anomalies in data collection"
+_FALLBACK_RULE_BASED_FINDING = "Analysis based on rule-based thresholds (LLM unavailable)"
+
 
 class InsightService:
     def __init__(self, llm_client: LLMClient, settings: Settings):
@@ -31,43 +39,47 @@ class InsightService:
         """
         start_time = time.time()
         fallback_used = False
+        values = request.data.get('values') or []
 
         logger.info(f"Request data: {request.data}")
         logger.info(f"Request input_type: {request.input_type}")
         try:
             # Step 1: Extract features
-            features = self._extract_features(request)
-            logger.info(f"Features extracted: {features.dict()}")
+            features = self._extract_features(request, values)
+            logger.info(f"Features extracted: {features.model_dump()}")
 
             # Step 1.1: Run anomaly detection
-            anomaly_result = None
-            if request.input_type == "metrics":
-                values = request.data.get('values', [])
-                if len(values) >= 3:
-                    anomaly_result = self.anomaly_detector.z_score_detection(values)
-                    logger.info(f"Anomaly detection: {anomaly_result.is_anomaly} "
-                                f"(z-score: {anomaly_result.z_score:.2f})")
-
-            # Step 2: Build prompt
+            anomaly_result = self._detect_anomaly(request, values)
+
             metric_name = self._get_metric_name(request)
-            prompt = self.prompt_builder.build_insight_prompt(
-                metric_name=metric_name,
-                features=features,
-                input_data=request.data,
-                anomaly_result=anomaly_result  # ← ADD THIS
+
+            # Step 1.2: Reuse the insight of a request with the same features
+            cache_key, insight = await self._lookup_cached_insight(
+                request, metric_name, features, anomaly_result
             )
 
-            # Step 3: Call LLM with retry logic
-            llm_output = await self._call_llm_with_retry(prompt)
+            if insight is None:
+                # Step 2: Build prompt
+                prompt = self.prompt_builder.build_insight_prompt(
+                    metric_name=metric_name,
+                    features=features,
+                    input_data=request.data,
+                    anomaly_result=anomaly_result  # ← ADD THIS
+                )
 
-            # Step 4: Validate and parse LLM output
-            try:
-                insight = InsightOutput(**json.loads(llm_output))
-            except (json.JSONDecodeError, ValidationError) as e:
-                logger.warning(f"LLM output validation failed: {e}")
-                # Use rule-based fallback
-                insight = self._generate_fallback_insight(features, metric_name)
-                fallback_used = True
+                # Step 3: Call LLM with retry logic
+                # Step 4: Output is parsed and validated in the same pass
+                try:
+                    insight = await self._call_llm_with_retry(prompt)
+                except ValidationError as e:
+                    logger.warning(f"LLM output validation failed: {e}")
+                    # Use rule-based fallback
+                    insight = self._generate_fallback_insight(features, metric_name)
+                    fallback_used = True
+
+                # Only LLM-generated insights are cached, never fallbacks
+                if cache_key and not fallback_used:
+                    await put_cached_insight(cache_key, insight, self.settings.insight_cache_ttl_seconds)
 
         except Exception as e:
             logger.error(f"Insight generation failed: {e}", exc_info=True)
@@ -100,6 +112,115 @@ class InsightService:
             fallback_used = True
 
         # Step 5: Build response
+        return self._build_response(request, values, metric_name, features, insight, fallback_used, start_time)
+
+    async def stream_insight(self, request: InsightRequest) -> AsyncIterator[Union[str, InsightResponse]]:
+        """
+        Streaming variant of generate_insight for the request path.
+        Yields LLM text deltas as they arrive, then the final InsightResponse.
+
+        The output is validated once the stream ends. A failed or invalid
+        stream falls back to the rule-based insight without retrying, since
+        its deltas were already sent. Invalid input raises ValueError on the
+        first iteration, before anything is yielded.
+        """
+        start_time = time.time()
+        fallback_used = False
+        values = request.data.get('values') or []
+
+        features = self._extract_features(request, values)
+        anomaly_result = self._detect_anomaly(request, values)
+        metric_name = self._get_metric_name(request)
+
+        cache_key, insight = await self._lookup_cached_insight(
+            request, metric_name, features, anomaly_result
+        )
+
+        if insight is not None:
+            yield insight.model_dump_json()
+        else:
+            prompt = self.prompt_builder.build_insight_prompt(
+                metric_name=metric_name,
+                features=features,
+                input_data=request.data,
+                anomaly_result=anomaly_result
+            )
+
+            chunks = []
+            try:
+                async for delta in self.llm_client.stream(
+                        prompt=prompt,
+                        response_schema=self.prompt_builder.get_response_schema(),
+                        temperature=self.settings.llm_temperature,
+                        system_prompt=self.prompt_builder.get_system_prompt()
+                ):
+                    chunks.append(delta)
+                    yield delta
+
+                insight = InsightOutput.model_validate_json("".join(chunks))
+            except Exception as e:
+                logger.warning(f"Streamed LLM output failed: {e}")
+                insight = self._generate_fallback_insight(features, metric_name)
+                fallback_used = True
+
+            if cache_key and not fallback_used:
+                await put_cached_insight(cache_key, insight, self.settings.insight_cache_ttl_seconds)
+
+        yield self._build_response(request, values, metric_name, features, insight, fallback_used, start_time)
+
+    def _detect_anomaly(self, request: InsightRequest, values: List[float]) -> Optional[AnomalyResult]:
+        """Z-score check on metric values, when there are enough of them"""
+        if request.input_type != "metrics" or len(values) < 3:
+            return None
+
+        anomaly_result = self.anomaly_detector.z_score_detection(values)
+        logger.info(f"Anomaly detection: {anomaly_result.is_anomaly} "
+                    f"(z-score: {anomaly_result.z_score:.2f})")
+        return anomaly_result
+
+    async def _lookup_cached_insight(
+            self,
+            request: InsightRequest,
+            metric_name: str,
+            features: FeatureSet,
+            anomaly_result: Optional[AnomalyResult]
+    ) -> Tuple[Optional[str], Optional[InsightOutput]]:
+        """
+        Cache key for the request's features and the insight cached under it.
+        The key is None when the insight cache is disabled. Like the LLM
+        response cache, it only applies at deterministic temperatures -
+        sampled output shouldn't be replayed to every caller.
+        """
+        if (
+                self.settings.insight_cache_ttl_seconds <= 0
+                or self.settings.llm_temperature > MAX_CACHEABLE_TEMPERATURE
+                or features is None
+        ):
+            return None, None
+
+        cache_key = insight_cache_key(
+            self.llm_client.get_model_name(),
+            request.input_type,
+            metric_name,
+            features,
+            anomaly_result
+        )
+        insight = await get_cached_insight(cache_key)
+        if insight is not None:
+            logger.info(f"Insight cache hit: {cache_key}")
+        return cache_key, insight
+
+    def _build_response(
+            self,
+            request: InsightRequest,
+            values: List[float],
+            metric_name: str,
+            features: FeatureSet,
+            insight: InsightOutput,
+            fallback_used: bool,
+            start_time: float
+    ) -> InsightResponse:
+        """Assemble the API response for a generated insight"""
         processing_time = int((time.time() - start_time) * 1000)
 
         return InsightResponse(
@@ -107,7 +228,7 @@ class InsightService:
             tenant_id=request.tenant_id,
             input_summary=InputSummary(
                 metric_name=metric_name,
-                data_points_count=len(request.data.get('values', [1, 2])),
+                data_points_count=len(values),
                 time_range=None  # TODO: Parse from timestamps
             ),
             features=features,
@@ -120,17 +241,15 @@ class InsightService:
             )
         )
 
-    def _extract_features(self, request: InsightRequest) -> FeatureSet:
+    def _extract_features(self, request: InsightRequest, values: List[float]) -> FeatureSet:
         """Route to appropriate feature extractor"""
         if request.input_type == "metrics":
-            values = request.data.get('values', [])  # ← CHANGE 1: Use .get()
-
             # CHANGE 2: Add validation
-            if not values or len(values) < 2:
+            if len(values) < 2:
                 logger.warning(f"Invalid values in request: {request.data}")
                 raise ValueError("Need at least 2 values in data.values")
 
-            context = request.context.dict() if request.context else None
+            context = request.context.model_dump() if request.context else None
             return self.feature_extractor.extract_from_metrics(values, context)
 
     def _get_metric_name(self, request: InsightRequest) -> str:
@@ -146,30 +265,38 @@ class InsightService:
         else:
             return request.data.get('series_name', 'Time Series')
 
-    async def _call_llm_with_retry(self, prompt: str) -> str:
+    async def _call_llm_with_retry(self, prompt: str) -> InsightOutput:
         """
         Call LLM with retry logic and progressive prompt refinement.
+        Malformed or off-schema output is retried with the validation error.
+        Provider HTTP and connection errors are raised straight away - the
+        client's HTTP layer has already retried them.
         """
         schema = self.prompt_builder.get_response_schema()
+        system_prompt = self.prompt_builder.get_system_prompt()
         last_error = None
 
         for attempt in range(self.settings.llm_max_retries):
             try:
                 logger.info(f"LLM call attempt {attempt + 1}/{self.settings.llm_max_retries}")
 
-                # Refine prompt after first failure
+                # Refine prompt after first failure - only the user prompt changes,
+                # so the static system prompt prefix stays cacheable
                 if attempt > 0 and last_error:
                     prompt += f"\n\nPREVIOUS ATTEMPT FAILED: {last_error}\nEnsure output is valid JSON."
 
                 response = await self.llm_client.generate(
                     prompt=prompt,
                     response_schema=schema,
-                    temperature=0.7
+                    temperature=self.settings.llm_temperature,
+                    system_prompt=system_prompt
                 )
 
-                # Validate it's parseable JSON
-                json.loads(response)
-                return response
+                # Parse and validate straight from the JSON string
+                return InsightOutput.model_validate_json(response)
+
+            except (httpx.HTTPStatusError, httpx.TransportError):
+                raise
 
             except Exception as e:
                 last_error = str(e)
@@ -185,16 +312,15 @@ class InsightService:
         Rule-based fallback when LLM fails.
         Ensures the system always returns a valid response.
         """
-        if features.change_percent > 0:
-            direction = "increase"
-            action_verb = "investigate the cause of this growth"
-        else:
-            direction = "decrease"
-            action_verb = "identify factors driving this decline"
+        direction, closing_action = (
+            _FALLBACK_INCREASE if features.change_percent > 0 else _FALLBACK_DECREASE
+        )
+        change = f"{abs(features.change_percent):.1f}%"
+        current_value = features.current_value
 
         summary = (
-            f"{metric_name} experienced a {abs(features.change_percent):.1f}% {direction} "
-            f"from {features.previous_value} to {features.current_value}. "
+            f"{metric_name} experienced a {change} {direction} "
+            f"from {features.previous_value} to {current_value}. "
             f"This change has been classified as {features.severity} severity based on "
             f"historical thresholds."
         )
@@ -205,12 +331,12 @@ class InsightService:
             confidence=0.60,  # Lower confidence for rule-based
             recommended_actions=[
                 f"Review {metric_name} data for the past 7 days to identify patterns",
-                f"Verify data quality and check for any anomalies in data collection",
-                f"Consult with relevant teams to {action_verb}"
+                _FALLBACK_DATA_QUALITY_ACTION,
+                closing_action
             ],
             key_findings=[
-                f"{abs(features.change_percent):.1f}% change detected",
-                f"Current value: {features.current_value}",
-                "Analysis based on rule-based thresholds (LLM unavailable)"
+                f"{change} change detected",
+                f"Current value: {current_value}",
+                _FALLBACK_RULE_BASED_FINDING
             ]
         )
@@ -2,39 +2,51 @@ from app.services.anomaly_detector import AnomalyResult
 from typing import Optional, Dict, Any
 from app.models.schemas import FeatureSet
 
-class PromptBuilder:
-    @staticmethod
-    def build_insight_prompt(
-            metric_name: str,
-            features: FeatureSet,
-            input_data: Dict[str, Any],
-            anomaly_result: Optional[AnomalyResult] = None  # NEW
-    ) -> str:
-        """Build LLM prompt with anomaly detection context"""
+# Built once - callers treat it as read-only
+_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "summary": {
+            "type": "string",
+            "description": "Brief summary of the insight (2-3 sentences)"
+        },
+        "severity": {
+            "type": "string",
+            "enum": ["low", "medium", "high", "critical"],
+            "description": "Severity level of the insight"
+        },
+        "confidence": {
+            "type": "number",
+            "minimum": 0.0,
+            "maximum": 1.0,
+            "description": "Confidence score between 0 and 1"
+        },
+        "recommended_actions": {
+            "type": "array",
+            "items": {"type": "string"},
+            "description": "List of 2-4 specific actionable steps",
+            "minItems": 2,
+            "maxItems": 4
+        },
+        "key_findings": {
+            "type": "array",
+            "items": {"type": "string"},
+            "description": "List of 2-4 key findings",
+            "minItems": 2,
+            "maxItems": 4
+        }
+    },
+    "required": ["summary", "severity", "confidence", "recommended_actions", "key_findings"]
+}
 
-        # Base prompt
-        prompt = f"""You are analyzing business metrics for an enterprise data platform.
 
-METRIC: {metric_name}
-CURRENT VALUE: {features.current_value}
-PREVIOUS VALUE: {features.previous_value}
-CHANGE: {features.change_absolute} ({features.change_percent:+.2f}%)
-RULE-BASED SEVERITY: {features.severity}
-"""
+# Static instructions sent as the system prompt. Nothing request-specific goes
+# in here, so providers can serve this prefix from their prompt cache.
+# The JSON braces need no escaping because it is never formatted.
+_SYSTEM_PROMPT = """You are analyzing business metrics for an enterprise data platform.
 
-        # Add anomaly detection context if available
-        if anomaly_result:
-            prompt += f"""
-STATISTICAL ANOMALY ANALYSIS:
-- Method: {anomaly_result.method}
-- Is Anomaly: {anomaly_result.is_anomaly}
-- Z-Score: {anomaly_result.z_score:.2f}
-- Details: {anomaly_result.details.get('interpretation', 'N/A')}
-"""
-
-        prompt += """
 TASK:
-Generate a concise business insight explaining this change. Your response must be actionable and relevant to C-level stakeholders.
+Generate a concise business insight explaining the metric change described by the user. Your response must be actionable and relevant to C-level stakeholders.
 
 REQUIREMENTS:
 1. Summary: 2-3 sentences explaining what happened and why it matters
@@ -50,11 +62,66 @@ OUTPUT FORMAT: Return ONLY valid JSON matching this schema:
   "confidence": 0.85,
   "recommended_actions": ["action1", "action2"],
   "key_findings": ["finding1", "finding2"]
-}
+}"""
+
+# Request-specific part of the prompt, sent as the user message
+_BASE_TEMPLATE = """METRIC: {metric_name}
+CURRENT VALUE: {current_value}
+PREVIOUS VALUE: {previous_value}
+CHANGE: {change_absolute} ({change_percent:+.2f}%)
+RULE-BASED SEVERITY: {severity}
+"""
 
-Generate your response now."""
+_ANOMALY_TEMPLATE = """
+STATISTICAL ANOMALY ANALYSIS:
+- Method: {method}
+- Is Anomaly: {is_anomaly}
+- Z-Score: {z_score:.2f}
+- Details: {interpretation}
+"""
 
-        return prompt
+_TASK_TAIL = "\nGenerate your response now."
+
+
+class PromptBuilder:
+    @staticmethod
+    def build_insight_prompt(
+            metric_name: str,
+            features: FeatureSet,
+            input_data: Dict[str, Any],
+            anomaly_result: Optional[AnomalyResult] = None  # NEW
+    ) -> str:
+        """
+        Build the request-specific LLM prompt with anomaly detection context.
+        Static instructions come from get_system_prompt().
+        """
+
+        # Base prompt
+        parts = [_BASE_TEMPLATE.format(
+            metric_name=metric_name,
+            current_value=features.current_value,
+            previous_value=features.previous_value,
+            change_absolute=features.change_absolute,
+            change_percent=features.change_percent,
+            severity=features.severity
+        )]
+
+        # Add anomaly detection context if available
+        if anomaly_result:
+            parts.append(_ANOMALY_TEMPLATE.format(
+                method=anomaly_result.method,
+                is_anomaly=anomaly_result.is_anomaly,
+                z_score=anomaly_result.z_score,
+                interpretation=anomaly_result.details.get('interpretation', 'N/A')
+            ))
+
+        parts.append(_TASK_TAIL)
+        return "".join(parts)
+
+    @staticmethod
+    def get_system_prompt() -> str:
+        """Static instructions shared by every insight prompt"""
+        return _SYSTEM_PROMPT
 
     @staticmethod
     def get_response_schema() -> Dict[str, Any]:
@@ -62,38 +129,4 @@ Generate your response now."""
         Returns the JSON schema for the expected LLM response.
         This ensures structured output from the LLM.
         """
-        return {
-            "type": "object",
-            "properties": {
-                "summary": {
-                    "type": "string",
-                    "description": "Brief summary of the insight (2-3 sentences)"
-                },
-                "severity": {
-                    "type": "string",
-                    "enum": ["low", "medium", "high", "critical"],
-                    "description": "Severity level of the insight"
-                },
-                "confidence": {
-                    "type": "number",
-                    "minimum": 0.0,
-                    "maximum": 1.0,
-                    "description": "Confidence score between 0 and 1"
-                },
-                "recommended_actions": {
-                    "type": "array",
-                    "items": {"type": "string"},
-                    "description": "List of 2-4 specific actionable steps",
-                    "minItems": 2,
-                    "maxItems": 4
-                },
-                "key_findings": {
-                    "type": "array",
-                    "items": {"type": "string"},
-                    "description": "List of 2-4 key findings",
-                    "minItems": 2,
-                    "maxItems": 4
-                }
-            },
-            "required": ["summary", "severity", "confidence", "recommended_actions", "key_findings"]
-        }
\ No newline at end of file
+        return _RESPONSE_SCHEMA
@@ -1,4 +1,6 @@
 from celery import Task
+from celery.signals import worker_process_init, worker_process_shutdown
+from celery_batches import Batches
 from app.celery_app import celery_app
 from app.services.insight_service import InsightService
 from app.clients.llm_base import LLMClient
@@ -9,91 +11,262 @@ from app.database.connection import db
 from app.repositories.insight_repository import InsightRepository
 from app.models.schemas import InsightRequest, InsightResponse
 from app.config import get_settings
+from collections import defaultdict
+from typing import Any, Coroutine, Dict, List, Optional, Tuple, TypeVar
+from uuid import uuid4
+from pydantic import ValidationError
+import asyncio
+import orjson
 import logging
 
+T = TypeVar("T")
+
 logger = logging.getLogger(__name__)
 
+CLEANUP_BATCH_SIZE = 10000  # Rows deleted per transaction by cleanup_old_insights
+PERSIST_MAX_RETRIES = 3  # Requeues of an insight whose batched INSERT failed
+
+# Event loop owned by this worker process. Pooled LLM and database connections
+# are bound to the loop they were opened on, so every task reuses this one
+# instead of asyncio.run() building and closing a loop per call.
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _run(coro: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine to completion on the worker's event loop"""
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop.run_until_complete(coro)
+
+
+def _build_llm_client() -> LLMClient:
+    """Create the LLM client configured for this worker"""
+    settings = get_settings()
+    provider = settings.llm_provider.lower()
+
+    if provider == "mock":
+        return MockLLMClient()
+    elif provider == "gemini":
+        return GeminiClient(
+            api_key=settings.gemini_api_key,
+            model=settings.gemini_model,
+            max_retries=settings.llm_max_retries
+        )
+    elif provider == "openai":
+        return OpenAIClient(
+            api_key=settings.openai_api_key,
+            model=settings.openai_model,
+            max_retries=settings.llm_max_retries
+        )
+    else:
+        raise ValueError(f"Unknown LLM provider: {provider}")
+
 
 class InsightTask(Task):
-    """Base task with LLM client initialization"""
+    """Base task with LLM client and insight service initialization"""
     _llm_client = None
+    _service = None
 
     @property
     def llm_client(self) -> LLMClient:
         if self._llm_client is None:
-            settings = get_settings()
-            provider = settings.llm_provider.lower()
-
-            if provider == "mock":
-                self._llm_client = MockLLMClient()
-            elif provider == "gemini":
-                self._llm_client = GeminiClient(
-                    api_key=settings.gemini_api_key,
-                    model=settings.gemini_model
-                )
-            elif provider == "openai":
-                self._llm_client = OpenAIClient(
-                    api_key=settings.openai_api_key,
-                    model=settings.openai_model
-                )
-            else:
-                raise ValueError(f"Unknown LLM provider: {provider}")
+            self._llm_client = _build_llm_client()
 
         return self._llm_client
 
+    @property
+    def service(self) -> InsightService:
+        # Built once per worker process; tasks run one at a time under prefork
+        if self._service is None:
+            InsightTask._service = InsightService(
+                llm_client=self.llm_client,
+                settings=get_settings()
+            )
+
+        return self._service
+
+
+@worker_process_init.connect
+def init_worker_llm_client(**kwargs):
+    """
+    Give each forked worker process its own LLM client and event loop,
+    so pooled connections are never shared with the parent process.
+    """
+    global _loop
+    _loop = None
+    InsightTask._llm_client = _build_llm_client()
+    InsightTask._service = None
+
+
+@worker_process_shutdown.connect
+def close_worker_llm_client(**kwargs):
+    """Close the process's pooled LLM connections on the loop they were opened on"""
+    global _loop
+    if InsightTask._llm_client is None:
+        return
+
+    try:
+        _run(InsightTask._llm_client.aclose())
+    except Exception as e:
+        logger.warning(f"Failed to close LLM client: {e}")
+    finally:
+        _loop.close()
+        _loop = None
+        InsightTask._llm_client = None
+        InsightTask._service = None
+
+
+class InsightBatchTask(Batches, InsightTask):
+    """Buffered task base: requests are flushed to the task as one list"""
+
+
+async def _save_insights(dumps: list) -> None:
+    """Persist a batch of serialized insights in one INSERT"""
+    async with db.get_async_session() as session:
+        repo = InsightRepository(session)
+        await repo.create_many_serialized(dumps)
+
+
+async def _generate(service: InsightService, request_data: dict) -> InsightResponse:
+    """Generate a single insight, validating the request inside the coroutine"""
+    return await service.generate_insight(InsightRequest(**request_data))
+
+
+def _group_duplicate_requests(requests_data: list) -> Tuple[Dict[bytes, List[InsightRequest]], int]:
+    """
+    Validate batch requests and group those with identical inputs.
+    Requests differing only in user/tenant share a group.
+
+    Returns:
+        (groups keyed by canonical input, number of invalid requests)
+    """
+    groups: Dict[bytes, List[InsightRequest]] = defaultdict(list)
+    invalid = 0
+    for request_data in requests_data:
+        try:
+            request = InsightRequest(**request_data)
+        except ValidationError as e:
+            logger.error(f"Batch item failed: {e}")
+            invalid += 1
+            continue
+
+        key = orjson.dumps(
+            request.model_dump(mode='json', exclude={'user_id', 'tenant_id'}),
+            option=orjson.OPT_SORT_KEYS
+        )
+        groups[key].append(request)
+    return groups, invalid
+
+
+async def _save_results(results: list) -> None:
+    """Persist generated insights in one session and one INSERT"""
+    if not results:
+        return
+    async with db.get_async_session() as session:
+        repo = InsightRepository(session)
+        await repo.create_many(results)
+
 
 @celery_app.task(
     bind=True,
-    base=InsightTask,
+    base=InsightBatchTask,
     name='app.tasks.insight_tasks.generate_insight_async',
-    max_retries=3,
-    default_retry_delay=60
+    flush_every=16,
+    flush_interval=2
 )
-def generate_insight_async(self, request_data: dict) -> dict:
+def generate_insight_async(self, requests: list) -> None:
     """
     Asynchronous insight generation task.
 
     This runs in a Celery worker, allowing the API to return immediately.
+    Submissions are buffered by celery-batches (16 requests or 2 seconds)
+    and the LLM calls of a flush run concurrently over the shared client.
+    Successful insights of a flush are saved with one INSERT, and each
+    result is stored under the task id it was submitted with.
 
     Args:
-        request_data: Dictionary representation of InsightRequest
-
-    Returns:
-        Dictionary representation of InsightResponse
+        requests: Buffered SimpleRequests, each carrying an InsightRequest dict
     """
-    try:
-        logger.info(f"Starting async insight generation: {request_data.get('user_id')}")
+    logger.info(f"Starting async insight generation: {len(requests)} buffered requests")
 
-        # Parse request
-        request = InsightRequest(**request_data)
+    service = self.service
 
-        # Get LLM client from task
-        settings = get_settings()
-        service = InsightService(
-            llm_client=self.llm_client,
-            settings=settings
+    async def run_all():
+        outcomes = await asyncio.gather(
+            *[_generate(service, req.args[0]) for req in requests],
+            return_exceptions=True
         )
+        await _save_results([o for o in outcomes if not isinstance(o, Exception)])
+        return outcomes
 
-        # Generate insight (this is async, so we need to run it)
-        import asyncio
-        loop = asyncio.get_event_loop()
-        result = loop.run_until_complete(service.generate_insight(request))
+    try:
+        outcomes = _run(run_all())
+    except Exception as e:
+        # The shared INSERT failed - none of the flush was saved
+        outcomes = [e] * len(requests)
 
-        # Save to database
-        session = db.get_session()
-        try:
-            repo = InsightRepository(session)
-            repo.create(result)
-            logger.info(f"Async insight saved: {result.insight_id}")
-        finally:
-            session.close()
+    for req, outcome in zip(requests, outcomes):
+        if isinstance(outcome, Exception):
+            logger.error(f"Async insight generation failed: {outcome}")
+            self.backend.mark_as_failure(req.id, outcome, request=req)
+        else:
+            logger.info(f"Async insight saved: {outcome.insight_id}")
+            self.backend.mark_as_done(req.id, outcome.model_dump(mode='json'), request=req)
 
-        return result.dict()
 
+@celery_app.task(
+    base=Batches,
+    name='app.tasks.insight_tasks.persist_insight',
+    ignore_result=True,
+    flush_every=50,
+    flush_interval=1
+)
+def persist_insight(requests: list) -> None:
+    """
+    Persist insights generated on the API request path.
+
+    Writes are buffered by celery-batches (50 insights or 1 second)
+    and stored with a single multi-row INSERT. If the INSERT fails, each
+    insight is requeued with backoff, up to PERSIST_MAX_RETRIES times.
+
+    Args:
+        requests: Buffered SimpleRequests, each carrying an InsightResponse dict
+            (and an `attempt` kwarg once requeued)
+    """
+    # The dicts were dumped from validated responses - insert them as they are
+    dumps = [req.args[0] for req in requests]
+
+    try:
+        _run(_save_insights(dumps))
     except Exception as e:
-        logger.error(f"Async insight generation failed: {e}")
-        # Retry on failure
-        raise self.retry(exc=e)
+        # These insights were already returned to clients - don't lose them silently
+        logger.error(f"Failed to persist {len(dumps)} insights: {e}")
+        _requeue_failed_persists(requests)
+        return
+
+    logger.info(f"Persisted {len(dumps)} insights")
+
+
+def _requeue_failed_persists(requests: list) -> None:
+    """
+    Send the insights of a failed flush back to persist_insight with backoff.
+    Insights that exhausted their retries, or couldn't be requeued, are
+    logged by insight_id.
+    """
+    for req in requests:
+        dump = req.args[0]
+        attempt = req.kwargs.get('attempt', 0) + 1
+
+        if attempt > PERSIST_MAX_RETRIES:
+            logger.error(f"Dropping insight {dump.get('insight_id')} after {PERSIST_MAX_RETRIES} failed saves")
+            continue
+
+        try:
+            persist_insight.apply_async(args=(dump,), kwargs={'attempt': attempt}, countdown=2 ** attempt)
+        except Exception as e:
+            logger.error(f"Dropping insight {dump.get('insight_id')}, requeue failed: {e}")
 
 
 @celery_app.task(
@@ -121,40 +294,59 @@ def batch_generate_insights(self, requests_data: list) -> dict:
         'insight_ids': []
     }
 
-    settings = get_settings()
-    service = InsightService(
-        llm_client=self.llm_client,
-        settings=settings
-    )
+    service = self.service
 
-    for request_data in requests_data:
-        try:
-            request = InsightRequest(**request_data)
+    # Identical inputs (e.g. dashboard refreshes) share a single LLM call
+    groups, _ = _group_duplicate_requests(requests_data)
 
-            import asyncio
-            loop = asyncio.get_event_loop()
-            result = loop.run_until_complete(service.generate_insight(request))
+    # Generate concurrently, bounded so a large batch doesn't flood the provider
+    semaphore = asyncio.Semaphore(service.settings.batch_concurrency)
 
-            # Save to database
-            session = db.get_session()
-            try:
-                repo = InsightRepository(session)
-                repo.create(result)
-            finally:
-                session.close()
+    async def generate_one(request: InsightRequest) -> InsightResponse:
+        async with semaphore:
+            return await service.generate_insight(request)
 
-            results['successful'] += 1
-            results['insight_ids'].append(str(result.insight_id))
+    async def run_batch():
+        outcomes = await asyncio.gather(
+            *[generate_one(members[0]) for members in groups.values()],
+            return_exceptions=True
+        )
+        generated = []
+        for members, outcome in zip(groups.values(), outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Batch item failed: {outcome}")
+                continue
+
+            # Fan the result out - each member gets its own insight row
+            generated.append(outcome)
+            generated.extend(
+                outcome.model_copy(update={
+                    'insight_id': uuid4(),
+                    'user_id': member.user_id,
+                    'tenant_id': member.tenant_id
+                })
+                for member in members[1:]
+            )
+
+        # Save the whole batch in one session and one INSERT
+        await _save_results(generated)
+        return generated
 
-        except Exception as e:
-            logger.error(f"Batch item failed: {e}")
-            results['failed'] += 1
+    try:
+        generated = _run(run_batch())
+    except Exception as e:
+        logger.error(f"Batch save failed: {e}")
+        generated = []
+
+    results['successful'] = len(generated)
+    results['failed'] = len(requests_data) - len(generated)
+    results['insight_ids'] = [str(result.insight_id) for result in generated]
 
     logger.info(f"Batch complete: {results['successful']}/{results['total']} successful")
     return results
 
 
-@celery_app.task(name='app.tasks.insight_tasks.cleanup_old_insights')
+@celery_app.task(name='app.tasks.insight_tasks.cleanup_old_insights', ignore_result=True)
 def cleanup_old_insights(days_old: int = 90):
     """
     Background task to clean up old insights.
@@ -172,11 +364,26 @@ def cleanup_old_insights(days_old: int = 90):
     session = db.get_session()
     try:
         from app.models.database import Insight
-        deleted_count = session.query(Insight).filter(
-            Insight.created_at < cutoff_date
-        ).delete()
+        from sqlalchemy import delete, select
+
+        # Delete oldest-first in batches, committing each one, so locks stay
+        # short and autovacuum can reclaim space as the cleanup goes
+        batch = (
+            select(Insight.insight_id)
+            .where(Insight.created_at < cutoff_date)
+            .order_by(Insight.created_at)
+            .limit(CLEANUP_BATCH_SIZE)
+        )
+        deleted_count = 0
+        while True:
+            deleted = session.execute(
+                delete(Insight).where(Insight.insight_id.in_(batch.scalar_subquery()))
+            ).rowcount
+            session.commit()
+            deleted_count += deleted
+            if deleted < CLEANUP_BATCH_SIZE:
+                break
 
-        session.commit()
         logger.info(f"Cleanup complete: {deleted_count} insights deleted")
 
         return {
@@ -1,11 +1,122 @@
-from slowapi import Limiter
-from slowapi.util import get_remote_address
-from fastapi import Request
+from fastapi import HTTPException, Request
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from typing import Callable, Tuple
+import logging
+import math
 import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Token bucket evaluated atomically in Redis (one round trip per check).
+# KEYS = {bucket_key}, ARGV = {now_ms, rate (tokens/sec), capacity, cost}
+TOKEN_BUCKET_SCRIPT = """
+local now = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local capacity = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'last')
+local tokens = tonumber(bucket[1])
+local last = tonumber(bucket[2])
+if tokens == nil or last == nil then
+    tokens = capacity
+    last = now
+end
+
+tokens = math.min(capacity, tokens + math.max(0, now - last) * rate / 1000)
+
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'last', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return allowed
+"""
+
+_PERIOD_SECONDS = {
+    "second": 1,
+    "minute": 60,
+    "hour": 3600,
+    "day": 86400
+}
+
+
+def parse_rate(limit_value: str) -> Tuple[int, int]:
+    """Parse a limit such as "10/minute" into (capacity, period seconds)"""
+    count, _, period = limit_value.partition("/")
+    return int(count), _PERIOD_SECONDS[period.strip().rstrip("s")]
+
+
+def get_remote_address(request: Request) -> str:
+    """Rate limit key: client IP address"""
+    return request.client.host if request.client else "127.0.0.1"
+
+
+class TokenBucketLimiter:
+    """
+    Token-bucket rate limiter backed by a Redis Lua script.
+    Buckets refill continuously, so there is no 2x burst at window
+    boundaries, and counts are shared across all API workers.
+    """
+
+    def __init__(self, storage_uri: str, key_prefix: str = "ratelimit"):
+        self.redis = Redis.from_url(storage_uri)
+        self.key_prefix = key_prefix
+        self._script = self.redis.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def hit(self, key: str, rate: float, capacity: int, cost: int = 1) -> bool:
+        """Take `cost` tokens from the bucket. Returns False if the bucket is empty."""
+        allowed = await self._script(
+            keys=[key],
+            args=[int(time.time() * 1000), rate, capacity, cost]
+        )
+        return bool(allowed)
+
+    def limit(
+            self,
+            limit_value: str,
+            key_func: Callable[[Request], str] = get_remote_address
+    ) -> Callable:
+        """
+        Build a FastAPI dependency enforcing `limit_value` (e.g. "10/minute").
+        Rate limiting is skipped when app.state.limiter is None.
+        """
+        capacity, period = parse_rate(limit_value)
+        rate = capacity / period
+        retry_after = str(math.ceil(period / capacity))
+
+        async def rate_limit(request: Request) -> None:
+            limiter = request.app.state.limiter
+            if limiter is None:
+                return
+
+            # Keyed on the route template, so path parameters share one bucket
+            route = request.scope["route"].path
+            key = f"{limiter.key_prefix}:{route}:{key_func(request)}"
+            try:
+                allowed = await limiter.hit(key, rate, capacity)
+            except RedisError as e:
+                # Fail open - an unavailable limiter shouldn't take the API down
+                logger.warning(f"Rate limiter unavailable: {e}")
+                return
+
+            if not allowed:
+                raise HTTPException(
+                    status_code=429,
+                    detail=f"Rate limit exceeded: {limit_value}",
+                    headers={"Retry-After": retry_after}
+                )
+
+        return rate_limit
+
 
 # Initialize rate limiter with Redis from environment variable
-limiter = Limiter(
-    key_func=get_remote_address,
+limiter = TokenBucketLimiter(
     storage_uri=os.getenv("REDIS_URL", "redis://redis:6379/0")
 )
 
@@ -13,21 +124,17 @@ limiter = Limiter(
 def get_tenant_id(request: Request) -> str:
     """
     Extract tenant_id from request for tenant-based rate limiting.
-    Tries multiple sources: body, query params, headers.
+    Tries headers, then query params; the result is remembered on
+    request.state so repeat lookups are free.
     """
-    # Try from request body (for POST requests)
-    if hasattr(request, '_json'):
-        return request._json.get('tenant_id', 'default')
-
-    # Try from query params
-    tenant_id = request.query_params.get('tenant_id')
-    if tenant_id:
-        return tenant_id
-
-    # Try from headers
-    tenant_id = request.headers.get('X-Tenant-ID')
+    tenant_id = getattr(request.state, 'tenant_id', None)
     if tenant_id:
         return tenant_id
 
-    # Default fallback
-    return 'default'
\ No newline at end of file
+    tenant_id = (
+        request.headers.get('X-Tenant-ID')
+        or request.query_params.get('tenant_id')
+        or 'default'
+    )
+    request.state.tenant_id = tenant_id
+    return tenant_id
@@ -0,0 +1,18 @@
+from redis.asyncio import Redis
+from app.config import get_settings
+
+settings = get_settings()
+
+# Shared async Redis clients for request-path lookups (same instance as Celery).
+# Connections are opened lazily from bounded pools.
+redis_client = Redis.from_url(
+    settings.redis_url,
+    decode_responses=True,
+    max_connections=50
+)
+
+# Raw bytes - Celery result meta is msgpack encoded
+redis_binary_client = Redis.from_url(
+    settings.redis_url,
+    max_connections=50
+)
@@ -3,6 +3,10 @@ Celery worker entry point.
 
 Start worker:
     celery -A celery_worker worker --loglevel=info
+
+Production layout (see docker-compose.yml):
+    celery -A celery_worker worker -Q celery,batch -P prefork --concurrency=4
+    celery -A celery_worker worker -Q insights,persist -P prefork --prefetch-multiplier=0 --concurrency=4
 """
 import sys
 import os
@@ -12,5 +16,9 @@ sys.path.insert(0, os.path.dirname(__file__))
 
 from app.celery_app import celery_app
 
+# Compile (or load from NUMBA_CACHE_DIR) and warm the anomaly kernels in the
+# prefork parent, so child processes inherit them instead of compiling on first task
+import app.services.anomaly_detector  # noqa: F401
+
 if __name__ == '__main__':
     celery_app.start()
@@ -1,6 +1,7 @@
 """
 Example database queries for learning PostgreSQL/SQLAlchemy
 """
+import asyncio
 import sys
 import os
 import sqlalchemy as sa
@@ -17,7 +18,6 @@ import json
 def example_queries():
     """Demonstrate common database queries"""
     session = db.get_session()
-    repo = InsightRepository(session)
 
     print("\n" + "=" * 60)
     print("POSTGRESQL + SQLALCHEMY QUERY EXAMPLES")
@@ -34,11 +34,13 @@ def example_queries():
             print(f"  - {insight.insight_id}: {insight.user_id} @ {insight.created_at}")
 
         # Example 2: Count insights by severity
+        # Grouping on the generated severity_cached column lets Postgres
+        # aggregate from ix_insight_severity (index-only scan once vacuumed)
         print("\n2. Count insights by severity:")
         severity_counts = session.query(
-            Insight.llm_output['severity'].astext.label('severity'),
-            func.count(Insight.insight_id).label('count')
-        ).group_by('severity').all()
+            Insight.severity_cached.label('severity'),
+            func.count().label('count')
+        ).group_by(Insight.severity_cached).all()
 
         for severity, count in severity_counts:
             print(f"  - {severity}: {count}")
@@ -52,25 +54,31 @@ def example_queries():
         print(f"  Found {len(user_insights)} insights for user 'demo'")
 
         # Example 4: Query JSONB fields
+        # severity_cached mirrors llm_output->>'severity' and is indexed
         print("\n4. Get high-severity insights:")
         high_severity = session.query(Insight).filter(
-            Insight.llm_output['severity'].astext == 'high'
+            Insight.severity_cached == 'high'
         ).all()
 
         print(f"  Found {high_severity} high-severity insights")
 
         # Example 5: Using repository pattern
         print("\n5. Using InsightRepository:")
-        insights_list, total = repo.get_by_user(
-            user_id='demo',
-            tenant_id='demo_tenant',
-            limit=10,
-            severity='high'
-        )
+        async def repository_example():
+            async with db.get_async_session() as async_session:
+                repo = InsightRepository(async_session)
+                return await repo.count_by_user(
+                    user_id='demo',
+                    tenant_id='demo_tenant',
+                    severity='high'
+                )
+
+        total = asyncio.run(repository_example())
 
         print(f"  Total high-severity insights for demo: {total}")
 
         # Example 6: Complex JSONB query
+        # The cast matches the ix_insight_confidence expression index
         print("\n6. Get insights where confidence > 0.8:")
         high_confidence = session.query(Insight).filter(
             Insight.llm_output['confidence'].astext.cast(sa.Float) > 0.8
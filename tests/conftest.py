@@ -0,0 +1,34 @@
+import pytest
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+
+class UnavailableRedis:
+    """Stands in for a Redis client (or registered script) whose every call fails to connect"""
+
+    async def __call__(self, *args, **kwargs):
+        raise RedisConnectionError("redis down")
+
+    def __getattr__(self, name):
+        return self
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Patch `module.<attribute>` with an empty in-memory Redis and return it"""
+    def patch(module, attribute: str = "redis_client") -> FakeRedis:
+        redis = FakeRedis(server=FakeServer(), decode_responses=True)
+        monkeypatch.setattr(module, attribute, redis)
+        return redis
+
+    return patch
+
+
+@pytest.fixture
+def redis_down(monkeypatch):
+    """Patch `module.<attribute>` with a Redis client that raises ConnectionError"""
+    def patch(module, attribute: str = "redis_client") -> None:
+        monkeypatch.setattr(module, attribute, UnavailableRedis())
+
+    return patch
@@ -81,4 +81,21 @@ def test_z_score_zero_std(detector):
 
     assert result.is_anomaly == False
     assert result.z_score == 0.0
-    assert "No variance" in result.details["note"]
\ No newline at end of file
+    assert "No variance" in result.details["note"]
+
+LARGE_MAGNITUDE_VALUES = [100000001, 100000003, 100000002, 100000004, 100000002, 100000050]
+
+
+def test_large_magnitude_values_keep_precision(detector):
+    """Test values above 2^24 aren't rounded together (spike of 50 on 1e8)"""
+    z_result = detector.z_score_detection(LARGE_MAGNITUDE_VALUES)
+    assert z_result.details["mean"] == pytest.approx(np.mean(LARGE_MAGNITUDE_VALUES), abs=1e-6)
+    assert z_result.details["std"] == pytest.approx(np.std(LARGE_MAGNITUDE_VALUES))
+
+    rolling_result = detector.rolling_std_detection(LARGE_MAGNITUDE_VALUES, window=5, threshold=2.0)
+    assert rolling_result.is_anomaly == True
+    assert rolling_result.details["rolling_std"] > 0
+
+    iqr_result = detector.iqr_detection(LARGE_MAGNITUDE_VALUES, multiplier=1.5)
+    assert iqr_result.is_anomaly == True
+    assert iqr_result.details["iqr"] > 0
@@ -0,0 +1,140 @@
+import threading
+import fakeredis
+import orjson
+import pytest
+from fakeredis.aioredis import FakeRedis
+from types import SimpleNamespace
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from app.api.routes import async_insights
+
+NDJSON_URL = "/api/v1/async/batch-generate-ndjson"
+STATUS_BATCH_URL = "/api/v1/async/task-status/batch"
+NDJSON_HEADERS = {"content-type": "application/x-ndjson"}
+
+
+def metrics_line(i: int) -> bytes:
+    return orjson.dumps({
+        "user_id": f"user_{i}",
+        "tenant_id": "tenant_1",
+        "input_type": "metrics",
+        "data": {"metric_name": "sales_data", "values": [100, 100 + i]}
+    })
+
+
+async def body_pieces(body: bytes, size: int = 100):
+    """Upload the body in small pieces so lines are split across chunks"""
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+@pytest.fixture
+def sent_tasks(monkeypatch):
+    """Batch tasks passed to celery_app.send_task, instead of the broker"""
+    sent = []
+
+    def send_task(name, args, **options):
+        sent.append(SimpleNamespace(
+            name=name,
+            requests=args[0],
+            options=options,
+            thread=threading.current_thread()
+        ))
+        return SimpleNamespace(id=f"task-{len(sent)}")
+
+    monkeypatch.setattr(async_insights.celery_app, "send_task", send_task)
+    return sent
+
+
+@pytest.fixture
+async def client():
+    app = FastAPI()
+    app.include_router(async_insights.router)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
+
+
+async def test_ndjson_submits_chunks_of_20_off_the_event_loop(client, sent_tasks):
+    """Test 45 requests become batch tasks of 20, 20 and 5, sent from worker threads"""
+    body = b"\n".join(metrics_line(i) for i in range(45)) + b"\n"
+
+    response = await client.post(NDJSON_URL, content=body_pieces(body), headers=NDJSON_HEADERS)
+
+    assert response.status_code == 200
+    assert response.json()["task_ids"] == ["task-1", "task-2", "task-3"]
+
+    assert [len(task.requests) for task in sent_tasks] == [20, 20, 5]
+    assert [r["user_id"] for task in sent_tasks for r in task.requests] == [f"user_{i}" for i in range(45)]
+    assert all(task.name == "app.tasks.insight_tasks.batch_generate_insights" for task in sent_tasks)
+    assert all(task.options["queue"] == "batch" for task in sent_tasks)
+    assert all(task.thread is not threading.main_thread() for task in sent_tasks)
+
+
+async def test_ndjson_rejects_more_than_100_requests(client, sent_tasks):
+    """Test line 101 is rejected and the chunks already enqueued are reported"""
+    body = b"\n".join(metrics_line(i) for i in range(101))
+
+    response = await client.post(NDJSON_URL, content=body, headers=NDJSON_HEADERS)
+
+    assert response.status_code == 400
+    detail = response.json()["detail"]
+    assert detail["error"] == "Batch size limited to 100 requests"
+    assert detail["submitted_task_ids"] == [f"task-{n}" for n in range(1, 6)]
+
+
+async def test_ndjson_malformed_line_mid_stream(client, sent_tasks):
+    """Test a bad line stops the upload, reporting its line number and earlier tasks"""
+    lines = [metrics_line(i) for i in range(30)]
+    lines[24] = b'{"user_id": "user_24", '  # Truncated JSON on line 25
+
+    response = await client.post(NDJSON_URL, content=b"\n".join(lines), headers=NDJSON_HEADERS)
+
+    assert response.status_code == 400
+    detail = response.json()["detail"]
+    assert detail["error"].startswith("Invalid request on line 25")
+    assert detail["submitted_task_ids"] == ["task-1"]
+    assert [len(task.requests) for task in sent_tasks] == [20]
+
+
+async def test_ndjson_empty_body(client, sent_tasks):
+    """Test an upload without requests is rejected"""
+    response = await client.post(NDJSON_URL, content=b"\n\n", headers=NDJSON_HEADERS)
+
+    assert response.status_code == 400
+    assert sent_tasks == []
+
+
+@pytest.fixture
+def result_backend(monkeypatch):
+    """The configured Celery result backend, writing to the Redis the status endpoints read"""
+    server = fakeredis.FakeServer()
+    backend = async_insights.celery_app.backend
+    monkeypatch.setattr(backend, "client", fakeredis.FakeRedis(server=server))
+    monkeypatch.setattr(async_insights, "redis_binary_client", FakeRedis(server=server))
+    return backend
+
+
+async def test_batch_status_decodes_backend_results(client, result_backend):
+    """Test PENDING, SUCCESS and FAILURE metas stored by Celery decode from one MGET"""
+    assert result_backend.serializer == "msgpack"
+
+    result_backend.store_result("task-ok", {"insight_id": "abc", "severity": "high"}, "SUCCESS")
+    result_backend.mark_as_failure("task-failed", ValueError("LLM unavailable"))
+
+    # Stored under the configured global key prefix
+    keys = await async_insights.redis_binary_client.keys("*")
+    assert sorted(keys) == [b"pythia:_celery-task-meta-task-failed", b"pythia:_celery-task-meta-task-ok"]
+
+    response = await client.post(STATUS_BATCH_URL, json={"task_ids": ["task-ok", "task-missing", "task-failed"]})
+
+    assert response.status_code == 200
+    ok, missing, failed = response.json()
+
+    assert ok["status"] == "SUCCESS"
+    assert ok["result"] == {"insight_id": "abc", "severity": "high"}
+
+    assert missing["status"] == "PENDING"
+    assert missing["result"] is None
+
+    assert failed["status"] == "FAILURE"
+    assert failed["error"] == "LLM unavailable"
@@ -0,0 +1,42 @@
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from httpx import ASGITransport, AsyncClient
+from app.utils.compression import SelectiveGZipMiddleware
+
+LARGE_BODY = "x" * 2048
+
+
+def compressed_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(SelectiveGZipMiddleware, minimum_size=1024)
+
+    @app.get("/large")
+    async def large():
+        return PlainTextResponse(LARGE_BODY)
+
+    @app.get("/events")
+    async def events():
+        async def stream():
+            for _ in range(3):
+                yield b"data: " + LARGE_BODY.encode() + b"\n\n"
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    return app
+
+
+async def test_large_responses_are_gzipped():
+    """Test ordinary responses over minimum_size are still compressed"""
+    async with AsyncClient(transport=ASGITransport(app=compressed_app()), base_url="http://test") as client:
+        response = await client.get("/large", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text == LARGE_BODY
+
+
+async def test_event_streams_are_not_compressed():
+    """Test SSE bodies pass through unencoded, with no Content-Encoding header"""
+    async with AsyncClient(transport=ASGITransport(app=compressed_app()), base_url="http://test") as client:
+        response = await client.get("/events", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in response.headers
+    assert response.content == (b"data: " + LARGE_BODY.encode() + b"\n\n") * 3
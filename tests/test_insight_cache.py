@@ -0,0 +1,103 @@
+import pytest
+from app.clients.mock_llm import MockLLMClient
+from app.config import Settings
+from app.models.schemas import FeatureSet, InsightOutput, InsightRequest
+from app.services import insight_cache, insight_service
+from app.services.anomaly_detector import AnomalyResult
+from app.services.insight_cache import insight_cache_key, get_cached_insight, put_cached_insight
+from app.services.insight_service import InsightService
+
+FEATURES = FeatureSet(
+    previous_value=100.0,
+    current_value=150.0,
+    change_absolute=50.0,
+    change_percent=50.0,
+    severity="critical"
+)
+
+INSIGHT = InsightOutput(
+    summary="Sales increased",
+    severity="critical",
+    confidence=0.9,
+    recommended_actions=["Investigate"],
+    key_findings=["50% increase"]
+)
+
+
+def features(**changes) -> FeatureSet:
+    return FEATURES.model_copy(update=changes)
+
+
+@pytest.fixture
+def cache_redis(fake_redis):
+    return fake_redis(insight_cache)
+
+
+def test_key_rounds_values_to_3_decimals():
+    """Test features equal to 3 decimal places share a key, larger differences don't"""
+    key = insight_cache_key("mock-llm-v1", "metrics", "sales", FEATURES)
+
+    assert key == insight_cache_key("mock-llm-v1", "metrics", "sales", features(current_value=150.0001))
+    assert key != insight_cache_key("mock-llm-v1", "metrics", "sales", features(current_value=150.01))
+    assert key != insight_cache_key("mock-llm-v1", "metrics", "sales", features(previous_value=99.0))
+
+
+def test_key_covers_model_metric_severity_and_anomaly():
+    """Test every other input that shapes the insight changes the key"""
+    key = insight_cache_key("mock-llm-v1", "metrics", "sales", FEATURES)
+    anomaly = AnomalyResult(is_anomaly=True, method="z_score", z_score=3.5, details={})
+
+    assert key.startswith("insight:")
+    assert key != insight_cache_key("gpt", "metrics", "sales", FEATURES)
+    assert key != insight_cache_key("mock-llm-v1", "metrics", "revenue", FEATURES)
+    assert key != insight_cache_key("mock-llm-v1", "metrics", "sales", features(severity="high"))
+    assert key != insight_cache_key("mock-llm-v1", "metrics", "sales", FEATURES, anomaly)
+
+
+async def test_put_then_get_round_trips(cache_redis):
+    """Test a cached insight is read back with its TTL"""
+    await put_cached_insight("insight:test", INSIGHT, ttl_seconds=900)
+
+    assert await get_cached_insight("insight:test") == INSIGHT
+    assert 0 < await cache_redis.ttl("insight:test") <= 900
+    assert await get_cached_insight("insight:missing") is None
+
+
+async def test_invalid_cached_insight_is_a_miss(cache_redis):
+    """Test an entry that no longer matches the schema is ignored"""
+    await cache_redis.set("insight:test", '{"summary": "old format"}')
+
+    assert await get_cached_insight("insight:test") is None
+
+
+async def test_cache_fails_open_on_redis_error(redis_down):
+    """Test Redis errors count as a miss and failed writes are ignored"""
+    redis_down(insight_cache)
+
+    assert await get_cached_insight("insight:test") is None
+    await put_cached_insight("insight:test", INSIGHT, ttl_seconds=900)
+
+
+@pytest.mark.parametrize("temperature,cached", [(0.0, True), (0.1, True), (0.7, False)])
+async def test_service_only_caches_deterministic_insights(monkeypatch, temperature, cached):
+    """Test the insight cache is skipped for sampled (temperature > 0.1) output"""
+    lookups = []
+
+    async def get_cached(key):
+        lookups.append(key)
+        return INSIGHT
+
+    monkeypatch.setattr(insight_service, "get_cached_insight", get_cached)
+    service = InsightService(MockLLMClient(), Settings(llm_temperature=temperature, insight_cache_ttl_seconds=900))
+    request = InsightRequest(
+        user_id="user_1",
+        tenant_id="tenant_1",
+        input_type="metrics",
+        data={"metric_name": "sales", "values": [100, 150]}
+    )
+
+    key, insight = await service._lookup_cached_insight(request, "sales", FEATURES, None)
+
+    assert (key is not None) == cached
+    assert (insight == INSIGHT) == cached
+    assert len(lookups) == int(cached)
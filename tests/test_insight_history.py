@@ -0,0 +1,158 @@
+import pytest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from uuid import UUID, uuid4
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.dialects import postgresql
+from app.api.routes import insights
+from app.database.connection import get_db
+from app.repositories.insight_repository import InsightRepository
+
+HISTORY_URL = "/api/v1/insight-history/user_1"
+COUNT_URL = "/api/v1/insight-history/user_1/count"
+TENANT_PARAMS = {"tenant_id": "tenant_1"}
+
+
+def history_row(created_at: datetime, insight_id: UUID) -> SimpleNamespace:
+    """Row as returned by the history projection (keys match InsightHistoryItem)"""
+    return SimpleNamespace(_mapping={
+        "insight_id": insight_id,
+        "timestamp": created_at,
+        "metric_name": "sales_data",
+        "severity": "high",
+        "summary": "Sales increased",
+        "change_percent": 30.0
+    })
+
+
+class FakeSession:
+    """Records executed statements and returns fixed rows"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        return SimpleNamespace(all=lambda: self.rows)
+
+
+class InMemoryHistoryRepository:
+    """Keyset-paginated history over a list, standing in for Postgres"""
+    insights = []
+
+    def __init__(self, session):
+        pass
+
+    async def get_by_user(self, user_id, tenant_id, limit=50, severity=None,
+                          cursor_created_at=None, cursor_id=None):
+        rows = sorted(self.insights, key=lambda r: (r._mapping["timestamp"], r._mapping["insight_id"]),
+                      reverse=True)
+        if cursor_created_at is not None and cursor_id is not None:
+            rows = [r for r in rows
+                    if (r._mapping["timestamp"], r._mapping["insight_id"]) < (cursor_created_at, cursor_id)]
+        return rows[:limit], len(rows) > limit
+
+    async def count_by_user(self, user_id, tenant_id, severity=None):
+        return len(self.insights)
+
+
+@pytest.fixture
+def history_app(monkeypatch):
+    """Insights router with an in-memory repository, no database or rate limiting"""
+    base = datetime(2024, 12, 10)
+    # Two rows share a timestamp so the insight_id tie-breaker is exercised
+    created = [base + timedelta(hours=h) for h in (0, 1, 1, 2, 3)]
+    monkeypatch.setattr(InMemoryHistoryRepository, "insights", [history_row(c, uuid4()) for c in created])
+    monkeypatch.setattr(insights, "InsightRepository", InMemoryHistoryRepository)
+
+    app = FastAPI()
+    app.state.limiter = None
+    app.include_router(insights.router)
+    app.dependency_overrides[get_db] = lambda: None
+    return app
+
+
+@pytest.fixture
+async def client(history_app):
+    transport = ASGITransport(app=history_app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        yield ac
+
+
+async def test_get_by_user_fetches_one_extra_row_for_has_more():
+    """Test a full page plus one row means more follow, and the extra row is dropped"""
+    rows = [object() for _ in range(3)]
+    session = FakeSession(rows)
+
+    page, has_more = await InsightRepository(session).get_by_user("user_1", "tenant_1", limit=2)
+
+    assert page == rows[:2]
+    assert has_more is True
+
+    compiled = session.statements[0].compile(dialect=postgresql.dialect())
+    assert 3 in compiled.params.values()  # LIMIT limit + 1
+
+
+async def test_get_by_user_last_page():
+    """Test a short page means no more rows"""
+    rows = [object() for _ in range(2)]
+
+    page, has_more = await InsightRepository(FakeSession(rows)).get_by_user("user_1", "tenant_1", limit=2)
+
+    assert page == rows
+    assert has_more is False
+
+
+async def test_get_by_user_cursor_filters_on_created_at_and_id():
+    """Test the cursor becomes a (created_at, insight_id) row comparison"""
+    session = FakeSession([])
+    await InsightRepository(session).get_by_user(
+        "user_1", "tenant_1", limit=2,
+        cursor_created_at=datetime(2024, 12, 10), cursor_id=uuid4()
+    )
+
+    sql = str(session.statements[0].compile(dialect=postgresql.dialect()))
+    assert "(insights.created_at, insights.insight_id) < (" in sql
+    assert "ORDER BY insights.created_at DESC, insights.insight_id DESC" in sql
+
+
+async def test_history_pages_follow_next_cursor(client):
+    """Test walking next_cursor returns every insight once, newest first"""
+    seen = []
+    params = {**TENANT_PARAMS, "limit": 2}
+    pages = 0
+
+    while True:
+        response = await client.get(HISTORY_URL, params=params)
+        assert response.status_code == 200
+        body = response.json()
+        pages += 1
+        seen.extend(item["insight_id"] for item in body["insights"])
+
+        pagination = body["pagination"]
+        if not pagination["has_more"]:
+            assert pagination["next_cursor"] is None
+            break
+        params = {**TENANT_PARAMS, "limit": 2, **pagination["next_cursor"]}
+
+    expected = [
+        str(r._mapping["insight_id"]) for r in sorted(
+            InMemoryHistoryRepository.insights,
+            key=lambda r: (r._mapping["timestamp"], r._mapping["insight_id"]),
+            reverse=True
+        )
+    ]
+    assert pages == 3
+    assert seen == expected
+
+
+async def test_history_count_fails_open_without_redis(client, redis_down):
+    """Test the count is read from the database when Redis is down"""
+    redis_down(insights)
+
+    response = await client.get(COUNT_URL, params=TENANT_PARAMS)
+
+    assert response.status_code == 200
+    assert response.json()["total_count"] == 5
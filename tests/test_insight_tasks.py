@@ -0,0 +1,175 @@
+import pytest
+from types import SimpleNamespace
+from app.models.schemas import (
+    InsightRequest, InsightResponse, FeatureSet,
+    InsightOutput, InputSummary, ResponseMetadata
+)
+from app.tasks import insight_tasks
+from app.tasks.insight_tasks import (
+    InsightTask, PERSIST_MAX_RETRIES, _group_duplicate_requests, batch_generate_insights, persist_insight
+)
+
+
+def metrics_request(user_id: str, tenant_id: str, values: list) -> dict:
+    return {
+        "user_id": user_id,
+        "tenant_id": tenant_id,
+        "input_type": "metrics",
+        "data": {"metric_name": "sales_data", "values": values}
+    }
+
+
+def insight_response(request: InsightRequest) -> InsightResponse:
+    """Minimal generated insight for a request"""
+    return InsightResponse(
+        user_id=request.user_id,
+        tenant_id=request.tenant_id,
+        input_summary=InputSummary(metric_name="sales_data", data_points_count=2),
+        features=FeatureSet(
+            previous_value=100.0,
+            current_value=150.0,
+            change_absolute=50.0,
+            change_percent=50.0,
+            severity="critical"
+        ),
+        insight=InsightOutput(
+            summary="Sales increased",
+            severity="critical",
+            confidence=0.9,
+            recommended_actions=["Investigate"],
+            key_findings=["50% increase"]
+        ),
+        metadata=ResponseMetadata(
+            processing_time_ms=1,
+            llm_provider="mock",
+            model_version="mock-llm-v1",
+            fallback_used=False
+        )
+    )
+
+
+class StubInsightService:
+    """Records generate_insight calls instead of calling an LLM"""
+
+    def __init__(self):
+        self.settings = SimpleNamespace(batch_concurrency=10)
+        self.requests = []
+
+    async def generate_insight(self, request: InsightRequest) -> InsightResponse:
+        self.requests.append(request)
+        return insight_response(request)
+
+
+@pytest.fixture
+def worker_loop(monkeypatch):
+    """Fresh worker event loop per test, closed afterwards"""
+    monkeypatch.setattr(insight_tasks, "_loop", None)
+    yield
+    if insight_tasks._loop is not None:
+        insight_tasks._loop.close()
+
+
+@pytest.fixture
+def saved(monkeypatch):
+    """Insights passed to _save_results, instead of writing to the database"""
+    rows = []
+
+    async def save_results(results):
+        rows.extend(results)
+
+    monkeypatch.setattr(insight_tasks, "_save_results", save_results)
+    return rows
+
+
+@pytest.fixture
+def service(monkeypatch):
+    stub = StubInsightService()
+    monkeypatch.setattr(InsightTask, "_service", stub)
+    return stub
+
+
+BATCH = [
+    metrics_request("user_a", "tenant_a", [100, 150]),
+    metrics_request("user_b", "tenant_b", [100, 150]),  # Same data as user_a
+    metrics_request("user_a", "tenant_a", [100, 90]),   # Different data
+    metrics_request("user_c", "tenant_c", [100]),       # Invalid - too few values
+]
+
+
+def test_group_duplicate_requests_ignores_user_and_tenant():
+    """Test requests differing only in user/tenant share a group, other data doesn't"""
+    groups, invalid = _group_duplicate_requests(BATCH)
+
+    members = sorted(([r.user_id for r in group] for group in groups.values()), key=len)
+    assert members == [["user_a"], ["user_a", "user_b"]]
+    assert invalid == 1
+
+
+def test_batch_generates_once_per_group_and_fans_out(worker_loop, saved, service):
+    """Test duplicates share one LLM call and each member gets its own insight"""
+    results = batch_generate_insights(BATCH)
+
+    assert len(service.requests) == 2
+
+    owners = sorted((row.user_id, row.tenant_id) for row in saved)
+    assert owners == [("user_a", "tenant_a"), ("user_a", "tenant_a"), ("user_b", "tenant_b")]
+    assert len({row.insight_id for row in saved}) == 3
+
+    assert results["total"] == 4
+    assert results["successful"] == 3
+    assert results["failed"] == 1
+    assert results["insight_ids"] == [str(row.insight_id) for row in saved]
+
+
+def persist_request(insight_id: str, attempt: int = None) -> SimpleNamespace:
+    """Buffered persist_insight request as celery-batches passes it"""
+    return SimpleNamespace(
+        args=({"insight_id": insight_id},),
+        kwargs={} if attempt is None else {"attempt": attempt}
+    )
+
+
+@pytest.fixture
+def failing_save(monkeypatch):
+    async def save_insights(dumps):
+        raise ConnectionError("database unavailable")
+
+    monkeypatch.setattr(insight_tasks, "_save_insights", save_insights)
+
+
+@pytest.fixture
+def requeued(monkeypatch):
+    """persist_insight.apply_async calls, instead of the broker"""
+    calls = []
+    monkeypatch.setattr(persist_insight, "apply_async", lambda **options: calls.append(options))
+    return calls
+
+
+def test_persist_failure_requeues_with_backoff(worker_loop, failing_save, requeued):
+    """Test a failed INSERT sends every insight back with its attempt count"""
+    persist_insight.run([persist_request("id-1"), persist_request("id-2", attempt=1)])
+
+    assert requeued == [
+        {"args": ({"insight_id": "id-1"},), "kwargs": {"attempt": 1}, "countdown": 2},
+        {"args": ({"insight_id": "id-2"},), "kwargs": {"attempt": 2}, "countdown": 4},
+    ]
+
+
+def test_persist_failure_logs_dropped_insights(worker_loop, failing_save, requeued, caplog):
+    """Test insights out of retries are logged by id instead of requeued"""
+    persist_insight.run([persist_request("id-1", attempt=PERSIST_MAX_RETRIES)])
+
+    assert requeued == []
+    assert "Dropping insight id-1" in caplog.text
+
+
+def test_persist_failure_logs_insights_that_cannot_be_requeued(worker_loop, failing_save, monkeypatch, caplog):
+    """Test a broker error while requeueing is logged with the insight id"""
+    def broker_down(**options):
+        raise ConnectionError("broker unavailable")
+
+    monkeypatch.setattr(persist_insight, "apply_async", broker_down)
+
+    persist_insight.run([persist_request("id-1")])
+
+    assert "Dropping insight id-1, requeue failed" in caplog.text
@@ -1,106 +1,209 @@
+import asyncio
+import orjson
 import pytest
-from fastapi.testclient import TestClient
-from app.main import app
-from app.api.dependencies import get_llm_client
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
 from app.clients.mock_llm import MockLLMClient
-from app.utils.rate_limiter import limiter
+from app.models.schemas import InsightOutput, InsightRequest, InsightResponse
+
+HEALTH_URL = "/health"
+GENERATE_INSIGHT_URL = "/api/v1/generate-insight"
+STREAM_URL = "/api/v1/generate-insight/stream"
+HISTORY_URL = "/api/v1/insight-history/test_user_123"
+HISTORY_PARAMS = {"tenant_id": "test_tenant"}
+MOCK_LLM_URL = "/api/v1/mock-llm"
+JSON_HEADERS = {"content-type": "application/json"}
+
+# Full valid request, serialized once for every test that posts it unchanged
+VALID_BODY = orjson.dumps({
+    "user_id": "test_user_123",
+    "tenant_id": "test_tenant",
+    "input_type": "metrics",
+    "data": {
+        "metric_name": "sales_data",
+        "values": [100, 105, 103, 150],
+        "timestamps": [
+            "2024-12-10T00:00:00Z",
+            "2024-12-11T00:00:00Z",
+            "2024-12-12T00:00:00Z",
+            "2024-12-13T00:00:00Z"
+        ]
+    }
+})
 
-# Override LLM client with mock for testing
-def get_mock_llm_client():
-    return MockLLMClient()
 
-app.dependency_overrides[get_llm_client] = get_mock_llm_client
+def _json(response):
+    """Decode a response body with orjson"""
+    return orjson.loads(response.content)
 
-# CRITICAL FIX: Disable rate limiting for tests
-app.state.limiter = None  # This disables the rate limiter
 
-client = TestClient(app)
+def _sse_events(response):
+    """(event, decoded data) pairs of a server-sent event stream"""
+    events = []
+    for block in response.content.split(b"\n\n"):
+        if not block.strip():
+            continue
+        fields = dict(line.split(b": ", 1) for line in block.split(b"\n"))
+        events.append((fields[b"event"].decode(), orjson.loads(fields[b"data"])))
+    return events
 
 
-def test_health_check():
-    """Test health endpoint"""
-    response = client.get("/health")
-    assert response.status_code == 200
-    assert response.json()["status"] == "healthy"
+# All tests share the session event loop the client fixture was opened on
+pytestmark = pytest.mark.asyncio(scope="session")
 
 
-def test_generate_insight_valid_request():
-    """Test successful insight generation"""
-    payload = {
+# Override LLM client with mock for testing - one shared instance, like the app's cached client
+mock_llm_client = MockLLMClient()
+
+
+def get_mock_llm_client():
+    return mock_llm_client
+
+
+@pytest.fixture(scope="session")
+def app():
+    """
+    The FastAPI app, imported on first use so that collection (and -k or
+    --collect-only runs) doesn't pay for building it
+    """
+    from app.main import app
+    return app
+
+
+@pytest.fixture(scope="session", autouse=True)
+def test_app_overrides(app):
+    """Mock LLM and no rate limiting for the test run; restored afterwards"""
+    from app.api.dependencies import get_llm_client
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setitem(app.dependency_overrides, get_llm_client, get_mock_llm_client)
+        mp.setattr(app.state, "limiter", None)  # This disables the rate limiter
+        yield
+
+
+@pytest_asyncio.fixture(scope="session")
+async def client(app, test_app_overrides):
+    """
+    One client for the whole run, calling the app in-process on the test
+    event loop. App errors come back as 500 responses, like a real server.
+    ASGITransport doesn't send lifespan events, so the app's lifespan is
+    entered here once for the session.
+    """
+    transport = ASGITransport(app=app, raise_app_exceptions=False)
+    async with app.router.lifespan_context(app):
+        async with AsyncClient(transport=transport, base_url="http://test") as ac:
+            yield ac
+
+
+@pytest.fixture
+def base_metrics_payload():
+    """Minimal valid metrics request; tests mutate their own copy"""
+    return {
         "user_id": "test_user_123",
         "tenant_id": "test_tenant",
         "input_type": "metrics",
         "data": {
             "metric_name": "sales_data",
-            "values": [100, 105, 103, 150],
-            "timestamps": [
-                "2024-12-10T00:00:00Z",
-                "2024-12-11T00:00:00Z",
-                "2024-12-12T00:00:00Z",
-                "2024-12-13T00:00:00Z"
-            ]
+            "values": [100, 150]
         }
     }
 
-    response = client.post("/api/v1/generate-insight", json=payload)
+
+async def test_health_check(client):
+    """Test health endpoint"""
+    response = await client.get(HEALTH_URL)
     assert response.status_code == 200
+    assert _json(response)["status"] == "healthy"
 
-    data = response.json()
-    assert data["user_id"] == "test_user_123"
-    assert data["tenant_id"] == "test_tenant"
-    assert "features" in data
-    assert "insight" in data
-    assert data["features"]["severity"] in ["critical", "high", "medium", "low"]
-    assert len(data["insight"]["recommended_actions"]) > 0
 
+async def test_generate_insight_valid_request(client):
+    """Test successful insight generation"""
+    response = await client.post(GENERATE_INSIGHT_URL, content=VALID_BODY, headers=JSON_HEADERS)
+    assert response.status_code == 200
 
-def test_generate_insight_insufficient_data():
-    """Test validation with insufficient data points"""
-    payload = {
-        "user_id": "test_user_123",
-        "tenant_id": "test_tenant",
-        "input_type": "metrics",
-        "data": {
-            "metric_name": "sales_data",
-            "values": [100]  # Only 1 value - should fail
-        }
-    }
+    # One validation pass checks structure, required fields and severity values
+    data = InsightResponse.model_validate_json(response.content)
+    assert data.user_id == "test_user_123"
+    assert data.tenant_id == "test_tenant"
+    assert len(data.insight.recommended_actions) > 0
 
-    response = client.post("/api/v1/generate-insight", json=payload)
-    assert response.status_code == 422  # Validation error
 
+async def test_generate_insight_concurrent_requests(client):
+    """Test concurrent insight requests are all served"""
+    responses = await asyncio.gather(*[
+        client.post(GENERATE_INSIGHT_URL, content=VALID_BODY, headers=JSON_HEADERS)
+        for _ in range(5)
+    ])
+    assert all(response.status_code == 200 for response in responses)
 
-def test_generate_insight_missing_fields():
-    """Test validation with missing required fields"""
-    payload = {
-        "user_id": "test_user_123",
-        # Missing tenant_id
-        "input_type": "metrics",
-        "data": {
-            "metric_name": "sales_data",
-            "values": [100, 150]
-        }
-    }
 
-    response = client.post("/api/v1/generate-insight", json=payload)
+async def test_generate_insight_stream(client):
+    """Test the stream sends LLM deltas, then the full insight"""
+    response = await client.post(STREAM_URL, content=VALID_BODY, headers=JSON_HEADERS)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert "content-encoding" not in response.headers  # Not buffered by gzip
+
+    events = _sse_events(response)
+    *deltas, (final_event, final_data) = events
+    assert deltas and all(event == "delta" and data for event, data in deltas)
+
+    assert final_event == "insight"
+    data = InsightResponse.model_validate(final_data)
+    assert data.user_id == "test_user_123"
+    # The deltas concatenate to the LLM output the insight was validated from
+    assert InsightOutput.model_validate_json("".join(d for _, d in deltas)) == data.insight
+
+
+async def test_generate_insight_stream_closes_llm_stream_on_disconnect():
+    """Test the service stream is closed when the client stops reading"""
+    from app.api.routes.insights import generate_insight_stream
+
+    closed = []
+
+    class StreamingService:
+        async def stream_insight(self, request):
+            try:
+                yield "first"
+                yield "second"
+            finally:
+                closed.append(True)
+
+    request = InsightRequest.model_validate_json(VALID_BODY)
+    response = await generate_insight_stream(request, StreamingService())
+
+    events = response.body_iterator
+    assert await events.__anext__() == b'event: delta\ndata: "first"\n\n'
+    await events.aclose()  # What Starlette does when the client disconnects
+
+    assert closed == [True]
+
+
+@pytest.mark.parametrize("mutate", [
+    pytest.param(lambda p: p["data"].__setitem__("values", [100]), id="insufficient_data"),
+    pytest.param(lambda p: p.pop("tenant_id"), id="missing_tenant_id"),
+])
+async def test_generate_insight_validation_errors(client, base_metrics_payload, mutate):
+    """Test invalid requests are rejected with a validation error"""
+    mutate(base_metrics_payload)
+
+    response = await client.post(GENERATE_INSIGHT_URL, json=base_metrics_payload)
     assert response.status_code == 422
 
 
-def test_insight_history_endpoint():
+async def test_insight_history_endpoint(client):
     """Test insight history retrieval"""
-    response = client.get(
-        "/api/v1/insight-history/test_user_123?tenant_id=test_tenant"
-    )
+    response = await client.get(HISTORY_URL, params=HISTORY_PARAMS)
     assert response.status_code == 200
 
-    data = response.json()
+    data = _json(response)
     assert data["user_id"] == "test_user_123"
     assert data["tenant_id"] == "test_tenant"
     assert "insights" in data
     assert "pagination" in data
 
 
-def test_mock_llm_endpoint():
+async def test_mock_llm_endpoint(client):
     """Test mock LLM endpoint"""
     payload = {
         "prompt": "Test prompt",
@@ -108,10 +211,10 @@ def test_mock_llm_endpoint():
         "max_tokens": 500
     }
 
-    response = client.post("/api/v1/mock-llm", json=payload)
+    response = await client.post(MOCK_LLM_URL, json=payload)
     assert response.status_code == 200
 
-    data = response.json()
+    data = _json(response)
     assert "content" in data
     assert "model" in data
     assert "usage" in data
\ No newline at end of file
@@ -0,0 +1,133 @@
+import httpx
+import orjson
+import pytest
+from pydantic import ValidationError
+from app.clients import llm_cache
+from app.clients.llm_base import LLMClient
+from app.clients.llm_cache import cache_key, cache_response
+from app.clients.openai_client import OpenAIClient
+from app.config import Settings
+from app.services.insight_service import InsightService
+
+
+def openai_client(handler) -> OpenAIClient:
+    """OpenAI client whose requests are answered by `handler` instead of the network"""
+    client = OpenAIClient(api_key="test-key", max_retries=3)
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+def completion(content: str) -> httpx.Response:
+    return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+
+async def test_provider_errors_are_retried_by_one_layer_only():
+    """Test a persistent 503 costs max_retries provider calls, not max_retries squared"""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503, headers={"Retry-After": "0"})
+
+    service = InsightService(openai_client(handler), Settings(llm_max_retries=3))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await service._call_llm_with_retry("prompt")
+
+    assert len(calls) == 3
+
+
+async def test_malformed_output_is_retried_by_the_service():
+    """Test off-schema output is retried once per service attempt"""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return completion(orjson.dumps({"summary": "missing fields"}).decode())
+
+    service = InsightService(openai_client(handler), Settings(llm_max_retries=3))
+
+    with pytest.raises(ValidationError):
+        await service._call_llm_with_retry("prompt")
+
+    assert len(calls) == 3
+
+
+SCHEMA = {"type": "object", "properties": {"summary": {"type": "string"}}}
+JSON_RESPONSE = orjson.dumps({"summary": "Sales increased"}).decode()
+
+
+class CountingLLMClient(LLMClient):
+    """Returns a fixed response and counts provider calls"""
+
+    def __init__(self, response: str = JSON_RESPONSE):
+        self.response = response
+        self.calls = 0
+
+    @cache_response
+    async def generate(self, prompt, response_schema, temperature=0.7, max_tokens=1000, system_prompt=None):
+        self.calls += 1
+        return self.response
+
+    def get_model_name(self) -> str:
+        return "counting-v1"
+
+
+@pytest.fixture
+def cache_redis(fake_redis):
+    return fake_redis(llm_cache)
+
+
+async def test_deterministic_responses_are_cached(cache_redis):
+    """Test a repeat call at temperature <= 0.1 is served from Redis"""
+    client = CountingLLMClient()
+
+    first = await client.generate("prompt", SCHEMA, temperature=0.0)
+    second = await client.generate("prompt", SCHEMA, temperature=0.0)
+
+    assert first == second == JSON_RESPONSE
+    assert client.calls == 1
+    assert await cache_redis.ttl(cache_key("CountingLLMClient", "counting-v1", 0.0, "prompt", SCHEMA)) > 0
+
+
+async def test_sampled_responses_are_not_cached(cache_redis):
+    """Test calls above the temperature gate always reach the provider"""
+    client = CountingLLMClient()
+
+    await client.generate("prompt", SCHEMA, temperature=0.7)
+    await client.generate("prompt", SCHEMA, temperature=0.7)
+
+    assert client.calls == 2
+    assert await cache_redis.keys("*") == []
+
+
+async def test_non_json_responses_are_not_cached(cache_redis):
+    """Test a malformed completion isn't replayed from the cache"""
+    client = CountingLLMClient(response="not json")
+
+    await client.generate("prompt", SCHEMA, temperature=0.0)
+    await client.generate("prompt", SCHEMA, temperature=0.0)
+
+    assert client.calls == 2
+    assert await cache_redis.keys("*") == []
+
+
+async def test_cache_fails_open_on_redis_error(redis_down):
+    """Test Redis errors on read and write fall through to the provider"""
+    redis_down(llm_cache)
+    client = CountingLLMClient()
+
+    assert await client.generate("prompt", SCHEMA, temperature=0.0) == JSON_RESPONSE
+    assert client.calls == 1
+
+
+def test_cache_key_covers_everything_that_shapes_the_output():
+    """Test the key changes with the system prompt, schema and prompt, and only with them"""
+    key = cache_key("OpenAIClient", "gpt", 0.0, "prompt", SCHEMA, "system")
+
+    assert key == cache_key("OpenAIClient", "gpt", 0.0, "prompt", dict(SCHEMA), "system")
+    assert key != cache_key("OpenAIClient", "gpt", 0.0, "prompt", SCHEMA, "other system")
+    assert key != cache_key("OpenAIClient", "gpt", 0.0, "prompt", SCHEMA, None)
+    assert key != cache_key("OpenAIClient", "gpt", 0.0, "prompt", {"type": "object"}, "system")
+    assert key != cache_key("OpenAIClient", "gpt", 0.0, "other prompt", SCHEMA, "system")
+    assert key != cache_key("GeminiClient", "gpt", 0.0, "prompt", SCHEMA, "system")
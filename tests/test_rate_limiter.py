@@ -0,0 +1,117 @@
+import pytest
+from fakeredis.aioredis import FakeRedis
+from fastapi import Depends, FastAPI, Request
+from httpx import ASGITransport, AsyncClient
+from app.utils import rate_limiter
+from app.utils.rate_limiter import TokenBucketLimiter, get_tenant_id
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    """Token bucket limiter running its Lua script on an in-memory Redis"""
+    monkeypatch.setattr(rate_limiter, "Redis", FakeRedis)
+    return TokenBucketLimiter("redis://test")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.time() for bucket refills"""
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(rate_limiter.time, "time", lambda: now[0])
+    return now
+
+
+def limited_app(limiter) -> FastAPI:
+    """App with one route allowing 2 requests per minute"""
+    app = FastAPI()
+    app.state.limiter = limiter
+
+    @app.get("/limited", dependencies=[Depends(limiter.limit("2/minute"))])
+    async def limited():
+        return {"ok": True}
+
+    return app
+
+
+def make_request(headers=None, query_string=b"") -> Request:
+    return Request({
+        "type": "http",
+        "method": "POST",
+        "path": "/",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        "query_string": query_string,
+    })
+
+
+async def test_bucket_denies_when_empty_and_refills(limiter, clock):
+    """Test tokens run out at capacity and come back at the refill rate"""
+    assert await limiter.hit("bucket", rate=1.0, capacity=2)
+    assert await limiter.hit("bucket", rate=1.0, capacity=2)
+    assert not await limiter.hit("bucket", rate=1.0, capacity=2)
+
+    clock[0] += 1.0  # One token refilled
+    assert await limiter.hit("bucket", rate=1.0, capacity=2)
+    assert not await limiter.hit("bucket", rate=1.0, capacity=2)
+
+
+async def test_limit_returns_429_with_retry_after(limiter, clock):
+    """Test the dependency rejects requests once the bucket is empty"""
+    app = limited_app(limiter)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        statuses = [(await client.get("/limited")).status_code for _ in range(2)]
+        denied = await client.get("/limited")
+
+    assert statuses == [200, 200]
+    assert denied.status_code == 429
+    assert denied.headers["Retry-After"] == "30"
+
+
+async def test_limit_shares_one_bucket_across_path_parameters(limiter, clock):
+    """Test changing a path parameter doesn't get a fresh bucket"""
+    app = FastAPI()
+    app.state.limiter = limiter
+
+    @app.get("/history/{user_id}", dependencies=[Depends(limiter.limit("2/minute"))])
+    async def history(user_id: str):
+        return {"user_id": user_id}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        statuses = [(await client.get(f"/history/user_{i}")).status_code for i in range(3)]
+
+    assert statuses == [200, 200, 429]
+
+
+async def test_limit_skipped_without_app_limiter(limiter):
+    """Test rate limiting is off when app.state.limiter is None"""
+    app = limited_app(limiter)
+    app.state.limiter = None
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        statuses = [(await client.get("/limited")).status_code for _ in range(5)]
+
+    assert statuses == [200] * 5
+
+
+async def test_limit_fails_open_on_redis_error(limiter, redis_down):
+    """Test requests are let through when Redis is unavailable"""
+    redis_down(limiter, "_script")
+    app = limited_app(limiter)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        statuses = [(await client.get("/limited")).status_code for _ in range(5)]
+
+    assert statuses == [200] * 5
+
+
+@pytest.mark.parametrize("headers,query_string,expected", [
+    ({"X-Tenant-ID": "header"}, b"tenant_id=query", "header"),
+    ({}, b"tenant_id=query", "query"),
+    ({}, b"", "default"),
+])
+def test_get_tenant_id_resolution_order(headers, query_string, expected):
+    """Test tenant_id comes from the header, then the query, then 'default'"""
+    request = make_request(headers, query_string)
+
+    assert get_tenant_id(request) == expected
+    assert request.state.tenant_id == expected